@@ -5,10 +5,11 @@ from sqlmodel import SQLModel
 
 # Import your models and config
 from src.auth.models import User
-from src.tasks.models import Task
+from src.tasks.models import Task, TaskSyncState, TaskTombstone
+from src.ingestion.models import DataSource, ExternalRecord
 from src.config import settings
 
-__all__ = ["User", "Task"]
+__all__ = ["User", "Task", "TaskTombstone", "TaskSyncState", "DataSource", "ExternalRecord"]
 
 def get_url():
     return str(settings.database_url)
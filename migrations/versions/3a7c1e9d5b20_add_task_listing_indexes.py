@@ -0,0 +1,38 @@
+"""Add task listing indexes
+
+Revision ID: 3a7c1e9d5b20
+Revises: 8f4250be4d1c
+Create Date: 2025-07-20 12:14:03.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7c1e9d5b20'
+down_revision: Union[str, Sequence[str], None] = '8f4250be4d1c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_task_user_id_id', 'task', ['user_id', 'id'], unique=False)
+    op.create_index('ix_task_user_id_completed_id', 'task', ['user_id', 'completed', 'id'], unique=False)
+    op.create_index(
+        'ix_task_user_id_deadline',
+        'task',
+        ['user_id', 'deadline'],
+        unique=False,
+        postgresql_where=sa.text('deadline IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_user_id_deadline', table_name='task')
+    op.drop_index('ix_task_user_id_completed_id', table_name='task')
+    op.drop_index('ix_task_user_id_id', table_name='task')
@@ -0,0 +1,34 @@
+"""Add open task deadline index
+
+Revision ID: c5e2a7d9f014
+Revises: b41d6f2e8c93
+Create Date: 2025-07-26 10:47:12.305981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e2a7d9f014'
+down_revision: Union[str, Sequence[str], None] = 'b41d6f2e8c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_task_user_id_deadline_open',
+        'task',
+        ['user_id', 'deadline', 'id'],
+        unique=False,
+        postgresql_where=sa.text('completed = false'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_user_id_deadline_open', table_name='task')
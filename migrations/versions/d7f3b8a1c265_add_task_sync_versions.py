@@ -0,0 +1,52 @@
+"""Add task sync versions and tombstones
+
+Revision ID: d7f3b8a1c265
+Revises: c5e2a7d9f014
+Create Date: 2025-07-29 21:15:40.872316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7f3b8a1c265'
+down_revision: Union[str, Sequence[str], None] = 'c5e2a7d9f014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('task', sa.Column('version', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('task', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_task_user_id_version', 'task', ['user_id', 'version'], unique=False)
+
+    op.create_table('task_tombstone',
+    sa.Column('task_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_index('ix_task_tombstone_user_id_version', 'task_tombstone', ['user_id', 'version'], unique=False)
+
+    op.create_table('task_sync_state',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('task_sync_state')
+    op.drop_index('ix_task_tombstone_user_id_version', table_name='task_tombstone')
+    op.drop_table('task_tombstone')
+    op.drop_index('ix_task_user_id_version', table_name='task')
+    op.drop_column('task', 'updated_at')
+    op.drop_column('task', 'version')
@@ -0,0 +1,34 @@
+"""Add task deadline reminder index
+
+Revision ID: e9b1c4f7a352
+Revises: d7f3b8a1c265
+Create Date: 2025-08-09 09:14:36.512047
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9b1c4f7a352'
+down_revision: Union[str, Sequence[str], None] = 'd7f3b8a1c265'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_task_deadline_open',
+        'task',
+        ['deadline', 'id'],
+        unique=False,
+        postgresql_where=sa.text('completed = false'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_deadline_open', table_name='task')
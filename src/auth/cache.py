@@ -0,0 +1,102 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from redis import RedisError
+
+from src.auth.models import User
+from src.config import settings
+from src.redis import delete_key, get_value, set_value
+
+logger = logging.getLogger(__name__)
+
+class PrincipalCache:
+    """
+    Two-tier cache of authenticated users keyed by username (the JWT subject).
+
+    The first tier is an in-process TTL/LRU, the second is Redis so that all
+    workers share one copy. Password hashes are never cached. Invalidation
+    clears the local tier and Redis; other workers may keep serving their
+    local copy for at most `local_ttl` seconds, so keep that value short.
+    """
+
+    def __init__(self, local_ttl: float, local_max_size: int, redis_ttl: int):
+        self.local_ttl = local_ttl
+        self.local_max_size = local_max_size
+        self.redis_ttl = redis_ttl
+        self._local: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._local_hits = 0
+        self._redis_hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _redis_key(username: str) -> str:
+        return f"auth:principal:{username}"
+
+    @staticmethod
+    def _to_user(data: dict) -> User:
+        # A fresh instance per request, so callers can't mutate the cached copy
+        return User.model_validate({**data, "hashed_password": ""})
+
+    def _set_local(self, username: str, data: dict):
+        self._local[username] = (time.monotonic() + self.local_ttl, data)
+        self._local.move_to_end(username)
+        while len(self._local) > self.local_max_size:
+            self._local.popitem(last=False)
+
+    async def get(self, username: str) -> User | None:
+        entry = self._local.get(username)
+        if entry is not None:
+            expires_at, data = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(username)
+                self._local_hits += 1
+                return self._to_user(data)
+            del self._local[username]
+
+        try:
+            raw = await get_value(self._redis_key(username))
+        except RedisError as e:
+            logger.warning(f"Principal cache read failed: {e}")
+            raw = None
+
+        if raw is None:
+            self._misses += 1
+            return None
+
+        data = json.loads(raw)
+        self._set_local(username, data)
+        self._redis_hits += 1
+        return self._to_user(data)
+
+    async def set(self, user: User):
+        data = user.model_dump(mode="json", exclude={"hashed_password"})
+        self._set_local(user.username, data)
+
+        try:
+            await set_value(self._redis_key(user.username), json.dumps(data), expire=self.redis_ttl)
+        except RedisError as e:
+            logger.warning(f"Principal cache write failed: {e}")
+
+    async def invalidate(self, username: str):
+        self._local.pop(username, None)
+
+        try:
+            await delete_key(self._redis_key(username))
+        except RedisError as e:
+            logger.warning(f"Principal cache invalidation failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "local_size": len(self._local),
+            "local_hits": self._local_hits,
+            "redis_hits": self._redis_hits,
+            "misses": self._misses,
+        }
+
+principal_cache = PrincipalCache(
+    local_ttl=settings.principal_cache_ttl,
+    local_max_size=settings.principal_cache_size,
+    redis_ttl=settings.principal_cache_redis_ttl,
+)
@@ -15,7 +15,7 @@ async def login_for_access_token(
     user_data: UserTokenDTO,
     session: SessionDep
 ) -> Token:
-    user = authenticate_user(user_data.username, user_data.password, session=session)
+    user = await authenticate_user(user_data.username, user_data.password, session=session)
 
     if not user:
         raise HTTPException(
@@ -36,7 +36,7 @@ async def register_user(
     user_dto: UserDTO,
     session: SessionDep
 ):
-    user = create_user(user_dto, session)
+    user = await create_user(user_dto, session)
 
     if not user:
         raise HTTPException(
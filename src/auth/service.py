@@ -5,15 +5,15 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import jwt
 from jwt import InvalidTokenError
-from passlib.context import CryptContext
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 
+from src.auth.cache import principal_cache
+from src.auth.hashing import password_hasher, pwd_context
 from src.auth.models import User, TokenData, UserDTO
 from src.config import settings
 from src.database import SessionDep
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -22,20 +22,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password) -> str:
     return pwd_context.hash(password)
 
-def disable_user(user: User, session: SessionDep):
+async def disable_user(user: User, session: SessionDep):
     user.disabled = True
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
+    await principal_cache.invalidate(user.username)
 
-def get_user(username: str, session: SessionDep) -> User | None:
-    user = session.exec(select(User).where(User.username == username)).first()
+async def get_user(username: str, session: SessionDep) -> User | None:
+    user = (await session.exec(select(User).where(User.username == username))).first()
     if user:
         return user
     return None
 
-def create_user(user_dto: UserDTO, session: SessionDep) -> User:
-    hashed_password = get_password_hash(user_dto.password)
+async def create_user(user_dto: UserDTO, session: SessionDep) -> User:
+    hashed_password = await password_hasher.hash(user_dto.password)
     user = User(
         username=user_dto.username,
         email=user_dto.email,
@@ -47,10 +48,10 @@ def create_user(user_dto: UserDTO, session: SessionDep) -> User:
     session.add(user)
 
     try:
-        session.commit()
-        session.refresh(user)
+        await session.commit()
+        await session.refresh(user)
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username or email already exists",
@@ -58,11 +59,11 @@ def create_user(user_dto: UserDTO, session: SessionDep) -> User:
 
     return user
 
-def authenticate_user(username: str, password: str, session: SessionDep):
-    user = get_user(username, session)
+async def authenticate_user(username: str, password: str, session: SessionDep):
+    user = await get_user(username, session)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return False
     return user
 
@@ -78,7 +79,11 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], session: SessionDep):
+async def authenticate_token(token: str, session: SessionDep) -> User:
+    """
+    Resolves a bearer token to its user, for callers that don't get the token
+    from the Authorization header (e.g. WebSockets pass it as a query parameter).
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -94,10 +99,10 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], sessio
             raise credentials_exception
 
         if datetime.now(timezone.utc) > datetime.fromtimestamp(exp, tz=timezone.utc):
-            user = get_user(username, session)
+            user = await get_user(username, session)
 
             if user:
-                disable_user(user, session)
+                await disable_user(user, session)
 
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -109,12 +114,20 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], sessio
     except InvalidTokenError:
         raise credentials_exception
 
-    user = get_user(username=token_data.username, session=session)
+    user = await principal_cache.get(token_data.username)
+    if user is not None:
+        return user
+
+    user = await get_user(username=token_data.username, session=session)
     if user is None:
         raise credentials_exception
 
+    await principal_cache.set(user)
     return user
 
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], session: SessionDep):
+    return await authenticate_token(token, session)
+
 async def get_current_active_user(
     current_user: Annotated[User, Depends(get_current_user)],
 ):
@@ -1,17 +1,54 @@
 from celery import Celery
-from config import settings
+from celery.signals import worker_process_init, worker_process_shutdown
+from kombu import Queue
+from src.config import settings
+from src.database import dispose_sync_engine, init_sync_engine
+from src.serialization import SERIALIZER, register_serializer
+
+register_serializer()
 
 celery_app = Celery(
     "tasks",
     broker=settings.celery_broker_url,
     backend=settings.celery_result_backend,
-    include=["src.tasks.tasks", "src.celery_tasks"]
+    include=["src.tasks.tasks", "src.celery_tasks", "src.ingestion.tasks"]
 )
 
+# Queues, each consumed by its own worker profile (see src/worker.py), so slow
+# batch jobs can't hold up latency-sensitive ones
+REALTIME_QUEUE = "realtime"
+DEFAULT_QUEUE = "default"
+BULK_QUEUE = "bulk"
+
+# With the Redis broker a lower number is a higher priority (0 is the highest),
+# and priorities order messages within a queue only
+TASK_ROUTES = {
+    "src.celery_tasks.send_notification": {"queue": REALTIME_QUEUE, "priority": 0},
+    "src.celery_tasks.flush_notifications": {"queue": REALTIME_QUEUE, "priority": 0},
+    "src.tasks.tasks.create_random_task": {"queue": REALTIME_QUEUE, "priority": 3},
+    "src.celery_tasks.example_task": {"queue": DEFAULT_QUEUE, "priority": 6},
+    "src.tasks.tasks.import_tasks": {"queue": BULK_QUEUE, "priority": 3},
+    "src.tasks.tasks.seed_random_tasks_chunk": {"queue": BULK_QUEUE, "priority": 6},
+    "src.celery_tasks.process_data": {"queue": BULK_QUEUE, "priority": 6},
+    "src.celery_tasks.consume_data_stream": {"queue": BULK_QUEUE, "priority": 6},
+    "src.ingestion.tasks.ingest_data_sources": {"queue": BULK_QUEUE, "priority": 6},
+}
+
 celery_app.conf.update(
-    task_serializer="json",
-    result_serializer="json",
-    accept_content=["json"],
+    task_queues=[Queue(name, routing_key=name) for name in (REALTIME_QUEUE, DEFAULT_QUEUE, BULK_QUEUE)],
+    task_default_queue=DEFAULT_QUEUE,
+    task_default_priority=3,
+    task_routes=TASK_ROUTES,
+    broker_transport_options={
+        "queue_order_strategy": "priority",
+        "priority_steps": list(range(10)),
+        "sep": ":",
+    },
+    task_serializer=SERIALIZER,
+    result_serializer=SERIALIZER,
+    # JSON is still accepted for messages sent before the switch
+    accept_content=[SERIALIZER, "json"],
+    result_accept_content=[SERIALIZER, "json"],
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
@@ -21,18 +58,58 @@ celery_app.conf.update(
 )
 
 celery_app.conf.beat_schedule = {
-    # Add random task every minute
-    'add-random-task-every-minute': {
-        'task': 'tasks.tasks.periodic_add_random_task',
+    # Add a random task for every user, fanned out over all workers
+    'add-random-task-every-day': {
+        'task': 'src.tasks.tasks.periodic_add_random_task',
         'schedule': 86400.0,  # Run every 86400 seconds (24 hours / everyday)
     },
 
+    # Fetch external data sources into the database
+    'ingest-data-sources-every-day': {
+        'task': 'src.ingestion.tasks.ingest_data_sources',
+        'schedule': 86400.0,
+    },
+
+    # Remove uploads of import jobs that never ran
+    'cleanup-import-uploads': {
+        'task': 'src.tasks.tasks.cleanup_import_uploads',
+        'schedule': 3600.0,
+    },
+
+    # Pick up stream records whose consumer task was lost
+    'consume-data-stream': {
+        'task': 'src.celery_tasks.consume_data_stream',
+        'schedule': 300.0,
+    },
+
+    # Deliver notification buffers whose batch window has passed
+    'flush-notifications': {
+        'task': 'src.celery_tasks.flush_notifications',
+        'schedule': settings.notification_batch_window,
+    },
+
+    # Remind users of open tasks due within the next reminder window
+    'deadline-reminders': {
+        'task': 'src.tasks.tasks.send_deadline_reminders',
+        'schedule': settings.reminder_interval,
+    },
+
     # Example periodic task (commented out)
     'periodic-task': {
-        'task': 'celery_tasks.example_task',
+        'task': 'src.celery_tasks.example_task',
         'schedule': 30.0,  # Run every 30 seconds
     },
 }
 
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    # A prefork child must not reuse connections opened in the parent
+    dispose_sync_engine(close=False)
+    init_sync_engine()
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    dispose_sync_engine()
+
 if __name__ == '__main__':
     celery_app.start()
\ No newline at end of file
@@ -1,8 +1,20 @@
 from src.celery import celery_app
+from src.config import settings
 from src.redis import redis_client
+import os
 import time
 import logging
-from tasks.tasks import create_random_task
+from src.data_pipeline import (
+    INPUT_STREAM,
+    append_records,
+    claim_consumer_slot,
+    ensure_group,
+    process_batch,
+    release_consumer_slot,
+)
+from src.notifications import NotificationBufferFull, deliver_notifications, notification_batcher
+from src.redis_cleanup import DEFAULT_POLICIES, CleanupPolicy, RedisCleaner
+from src.tasks.tasks import create_random_task
 
 logger = logging.getLogger(__name__)
 
@@ -28,65 +40,116 @@ def example_task(self, name: str):
         self.retry(exc=exc, countdown=60, max_retries=3)
 
 
-@celery_app.task
-def send_notification(message: str, recipient: str):
+@celery_app.task(bind=True, max_retries=5, ignore_result=True)
+def send_notification(self, message: str, recipient: str):
     """
-    Example task for sending notifications
+    Queues a notification for batched delivery by flush_notifications.
+    Code that isn't a Celery task itself can call notification_batcher.enqueue()
+    directly and skip the broker round trip altogether.
     """
-    logger.info(f"Sending notification to {recipient}: {message}")
-    # Simulate notification sending
-    time.sleep(1)
-    return f"Notification sent to {recipient}"
+    try:
+        notification_batcher.enqueue(recipient, message)
+    except NotificationBufferFull as exc:
+        # Backpressure: wait for the pending batch to go out
+        raise self.retry(exc=exc, countdown=settings.notification_batch_window)
+    return f"Notification queued for {recipient}"
 
 
-@celery_app.task
-def process_data(data: dict):
+@celery_app.task(ignore_result=True)
+def flush_notifications():
     """
-    Example task for data processing
+    Delivers every due notification buffer. Runs every batch window from beat,
+    and early once a buffer holds a full batch.
     """
-    logger.info(f"Processing data: {data}")
+    totals = notification_batcher.flush_due(deliver_notifications)
+    logger.info(f"Notification flush: {totals}")
+    return totals
 
-    # Simulate data processing
-    time.sleep(3)
 
-    # Store processed data in Redis
-    processed_key = f"processed_data_{int(time.time())}"
-    redis_client.setex(processed_key, 3600, str(data))
+def schedule_data_consumer():
+    """
+    Starts a consume_data_stream task unless one is already queued. Producers
+    call this after append_records().
+    """
+    if claim_consumer_slot():
+        consume_data_stream.delay()
+
+
+@celery_app.task
+def process_data(data: dict):
+    """
+    Queues a record for the stream pipeline in src.data_pipeline. Only kept
+    for callers that can't reach Redis: producers should call append_records()
+    and schedule_data_consumer() directly, instead of sending each record
+    through the broker.
+    """
+    entry_id, = append_records([data])
+    schedule_data_consumer()
 
     return {
-        "status": "processed",
-        "data": data,
-        "key": processed_key
+        "status": "queued",
+        "stream": INPUT_STREAM,
+        "id": entry_id,
     }
 
 
-@celery_app.task
-def cleanup_old_data():
+@celery_app.task(bind=True)
+def consume_data_stream(self, max_batches: int = None):
+    """
+    Processes input stream batches until the stream is drained or `max_batches`
+    is reached. Any number of these can run at once; the consumer group hands
+    each record to one of them. Runs from beat too, for records whose
+    consumer was lost.
+    """
+    # Records appended from now on need a consumer of their own
+    release_consumer_slot()
+    ensure_group()
+    consumer = f"{self.request.hostname}:{os.getpid()}"
+    max_batches = max_batches or settings.data_stream_max_batches
+
+    processed = batches = 0
+    while batches < max_batches:
+        count = process_batch(consumer)
+        if not count:
+            break
+        processed += count
+        batches += 1
+    else:
+        # Stopped with records left, hand over to a fresh task
+        schedule_data_consumer()
+
+    logger.info(f"Consumer {consumer} processed {processed} records")
+    return {"consumer": consumer, "processed": processed}
+
+
+@celery_app.task(bind=True)
+def cleanup_old_data(self, policies: list = None):
     """
-    Example periodic task for cleanup operations
+    Periodic cleanup of Redis keys. `policies` is a list of
+    {"pattern": ..., "expire": ...} dicts, defaulting to DEFAULT_POLICIES.
     """
     logger.info("Running cleanup task")
 
-    # Example: Clean up old Redis keys
-    # This is just an example - implement your actual cleanup logic
-    keys_deleted = 0
-    for key in redis_client.scan_iter(match="temp_*"):
-        redis_client.delete(key)
-        keys_deleted += 1
+    policies = [CleanupPolicy(**policy) for policy in policies] if policies else DEFAULT_POLICIES
+
+    def progress(meta: dict):
+        self.update_state(state="PROGRESS", meta=meta)
+
+    report = RedisCleaner().run(policies, progress)
 
-    logger.info(f"Cleanup completed. Deleted {keys_deleted} keys")
-    return f"Cleaned up {keys_deleted} temporary keys"
+    logger.info(f"Cleanup completed. Deleted {report['deleted']} keys, set a TTL on {report['expired']}")
+    return report
 
 
 @celery_app.task
-def trigger_random_task_creation():
+def trigger_random_task_creation(user_id: str):
     """
     Example task that triggers the creation of random tasks
     """
     logger.info("Triggering random task creation")
 
     # Call the random task creation
-    result1 = create_random_task.delay()
+    result1 = create_random_task.delay(user_id)
 
     return {
         "status": "triggered",
@@ -16,12 +16,67 @@ class Settings(BaseSettings):
     postgres_db: str = os.getenv("POSTGRES_DB", "postgres")
     postgres_host: str = os.getenv("POSTGRES_HOST", "localhost")
     postgres_port: int = int(os.getenv("POSTGRES_PORT", "5432"))
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    worker_db_pool_size: int = int(os.getenv("WORKER_DB_POOL_SIZE", "2"))
+    worker_db_max_overflow: int = int(os.getenv("WORKER_DB_MAX_OVERFLOW", "2"))
+    worker_db_pool_recycle: int = int(os.getenv("WORKER_DB_POOL_RECYCLE", "1800"))
     secret_key: str = os.getenv("SECRET_KEY")
     algorithm: str = os.getenv("ALGORITHM", "HS256")
     access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    password_hash_queue_timeout: float = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+    principal_cache_ttl: float = float(os.getenv("PRINCIPAL_CACHE_TTL", "10"))
+    principal_cache_size: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    principal_cache_redis_ttl: int = int(os.getenv("PRINCIPAL_CACHE_REDIS_TTL", "300"))
+    task_list_cache_ttl: int = int(os.getenv("TASK_LIST_CACHE_TTL", "300"))
+    bulk_max_items: int = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+    export_batch_size: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    # Must be a volume shared by the API and the Celery workers
+    import_dir: str = os.getenv("IMPORT_DIR", "/var/lib/task-imports")
+    import_upload_ttl: int = int(os.getenv("IMPORT_UPLOAD_TTL", "86400"))
+    import_chunk_size: int = int(os.getenv("IMPORT_CHUNK_SIZE", "10000"))
+    task_events_queue_size: int = int(os.getenv("TASK_EVENTS_QUEUE_SIZE", "100"))
+    task_events_keepalive: float = float(os.getenv("TASK_EVENTS_KEEPALIVE", "15"))
+    job_status_refresh_interval: float = float(os.getenv("JOB_STATUS_REFRESH_INTERVAL", "5"))
+    job_status_max_ids: int = int(os.getenv("JOB_STATUS_MAX_IDS", "100"))
+    job_status_batch_max_ids: int = int(os.getenv("JOB_STATUS_BATCH_MAX_IDS", "1000"))
+    seed_chunk_size: int = int(os.getenv("SEED_CHUNK_SIZE", "1000"))
+    notification_batch_size: int = int(os.getenv("NOTIFICATION_BATCH_SIZE", "50"))
+    notification_batch_window: float = float(os.getenv("NOTIFICATION_BATCH_WINDOW", "2"))
+    notification_buffer_limit: int = int(os.getenv("NOTIFICATION_BUFFER_LIMIT", "1000"))
+    # Must outlast one delivery, or a batch is sent twice
+    notification_flush_lease: float = float(os.getenv("NOTIFICATION_FLUSH_LEASE", "30"))
+    data_stream_batch_size: int = int(os.getenv("DATA_STREAM_BATCH_SIZE", "100"))
+    data_stream_max_batches: int = int(os.getenv("DATA_STREAM_MAX_BATCHES", "100"))
+    # Caps the result stream only; the input stream shrinks as records are processed
+    data_stream_maxlen: int = int(os.getenv("DATA_STREAM_MAXLEN", "100000"))
+    data_stream_consumer_ttl: int = int(os.getenv("DATA_STREAM_CONSUMER_TTL", "300"))
+    data_stream_claim_idle_ms: int = int(os.getenv("DATA_STREAM_CLAIM_IDLE_MS", "60000"))
+    cleanup_scan_count: int = int(os.getenv("CLEANUP_SCAN_COUNT", "1000"))
+    cleanup_batch_size: int = int(os.getenv("CLEANUP_BATCH_SIZE", "500"))
+    cleanup_max_ops_per_second: float = float(os.getenv("CLEANUP_MAX_OPS_PER_SECOND", "10000"))
+    reminder_interval: float = float(os.getenv("REMINDER_INTERVAL", "300"))
+    reminder_window: int = int(os.getenv("REMINDER_WINDOW", "3600"))
+    reminder_batch_size: int = int(os.getenv("REMINDER_BATCH_SIZE", "1000"))
+    reminder_dedupe_ttl: int = int(os.getenv("REMINDER_DEDUPE_TTL", "259200"))
+    ingestion_concurrency: int = int(os.getenv("INGESTION_CONCURRENCY", "10"))
+    ingestion_timeout: float = float(os.getenv("INGESTION_TIMEOUT", "30"))
+    ingestion_batch_size: int = int(os.getenv("INGESTION_BATCH_SIZE", "1000"))
     redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    redis_max_connections: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+    redis_pool_timeout: float = float(os.getenv("REDIS_POOL_TIMEOUT", "2"))
+    redis_command_timeout: float = float(os.getenv("REDIS_COMMAND_TIMEOUT", "1"))
     celery_broker_url: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
     celery_result_backend: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+    celery_realtime_concurrency: int = int(os.getenv("CELERY_REALTIME_CONCURRENCY", "4"))
+    celery_realtime_prefetch: int = int(os.getenv("CELERY_REALTIME_PREFETCH", "1"))
+    celery_default_concurrency: int = int(os.getenv("CELERY_DEFAULT_CONCURRENCY", "4"))
+    celery_default_prefetch: int = int(os.getenv("CELERY_DEFAULT_PREFETCH", "4"))
+    celery_bulk_concurrency: int = int(os.getenv("CELERY_BULK_CONCURRENCY", "2"))
+    celery_bulk_prefetch: int = int(os.getenv("CELERY_BULK_PREFETCH", "1"))
+    celery_compression_threshold: int = int(os.getenv("CELERY_COMPRESSION_THRESHOLD", "1024"))
+    celery_compression_level: int = int(os.getenv("CELERY_COMPRESSION_LEVEL", "6"))
 
 
     @property
@@ -29,4 +84,9 @@ class Settings(BaseSettings):
         return (f"postgresql://{self.postgres_user}:{self.postgres_password}"
                 f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}")
 
+    @property
+    def async_database_url(self) -> str:
+        return (f"postgresql+asyncpg://{self.postgres_user}:{self.postgres_password}"
+                f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}")
+
 settings = Settings()
@@ -0,0 +1,106 @@
+"""
+Record processing over Redis Streams.
+
+Producers append records to INPUT_STREAM. Workers read them in batches through
+the CONSUMER_GROUP consumer group, so adding consumers adds throughput and each
+record goes to one of them. Every processed batch is written to RESULT_STREAM,
+acknowledged and deleted from INPUT_STREAM in the same transaction, and records
+left pending by a consumer that died are claimed by the next one after
+`claim_idle_ms`. INPUT_STREAM is never trimmed, so it only ever holds records
+that haven't been processed yet; RESULT_STREAM is capped at `data_stream_maxlen`.
+"""
+import json
+import logging
+from typing import Iterable, List, Tuple
+
+from redis import ResponseError
+
+from src.config import settings
+from src.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+INPUT_STREAM = "data:input"
+RESULT_STREAM = "data:processed"
+CONSUMER_GROUP = "processors"
+# Set while a consumer task is queued, so producers start one at a time
+CONSUMER_SCHEDULED_KEY = "data:consumer:scheduled"
+
+Entry = Tuple[str, dict]
+
+def append_records(records: Iterable[dict], client=redis_client) -> List[str]:
+    """
+    Appends records to the input stream in one round trip and returns their
+    entry ids.
+    """
+    with client.pipeline(transaction=False) as pipe:
+        for record in records:
+            pipe.xadd(INPUT_STREAM, {"data": json.dumps(record)})
+        return pipe.execute()
+
+def claim_consumer_slot(client=redis_client) -> bool:
+    """
+    True if no consumer is queued yet and the caller should start one. The
+    slot frees up when that consumer starts, or after `data_stream_consumer_ttl`
+    seconds if it never does.
+    """
+    return bool(client.set(CONSUMER_SCHEDULED_KEY, "1", nx=True, ex=settings.data_stream_consumer_ttl))
+
+def release_consumer_slot(client=redis_client):
+    client.delete(CONSUMER_SCHEDULED_KEY)
+
+def ensure_group(client=redis_client):
+    try:
+        client.xgroup_create(INPUT_STREAM, CONSUMER_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+def process_record(record: dict) -> dict:
+    return {"status": "processed", "data": record}
+
+def _process(entry_id: str, fields: dict) -> dict:
+    try:
+        return {"source": entry_id, "data": json.dumps(process_record(json.loads(fields["data"])))}
+    except Exception as e:
+        # A record that can't be processed is reported on the result stream and
+        # acknowledged, so it isn't redelivered forever
+        logger.error(f"Processing stream entry {entry_id} failed: {e}")
+        return {"source": entry_id, "error": str(e)}
+
+def read_batch(consumer: str, client=redis_client) -> List[Entry]:
+    """
+    Up to `data_stream_batch_size` entries for this consumer, preferring ones
+    another consumer left unacknowledged for longer than `data_stream_claim_idle_ms`.
+    """
+    count = settings.data_stream_batch_size
+    # Entries deleted while pending come back as None and are dropped from the
+    # pending list by XAUTOCLAIM itself
+    _, claimed, *_ = client.xautoclaim(
+        INPUT_STREAM, CONSUMER_GROUP, consumer, settings.data_stream_claim_idle_ms, start_id="0-0", count=count
+    )
+    entries = [(entry_id, fields) for entry_id, fields in claimed if fields]
+    if entries:
+        return entries
+
+    response = client.xreadgroup(CONSUMER_GROUP, consumer, {INPUT_STREAM: ">"}, count=count)
+    return [entry for _, stream_entries in response for entry in stream_entries]
+
+def process_batch(consumer: str, client=redis_client) -> int:
+    """
+    Processes one batch and returns its size, 0 once the stream is drained.
+    """
+    entries = read_batch(consumer, client)
+    if not entries:
+        return 0
+
+    with client.pipeline(transaction=True) as pipe:
+        for entry_id, fields in entries:
+            pipe.xadd(RESULT_STREAM, _process(entry_id, fields), maxlen=settings.data_stream_maxlen, approximate=True)
+        entry_ids = [entry_id for entry_id, _ in entries]
+        pipe.xack(INPUT_STREAM, CONSUMER_GROUP, *entry_ids)
+        # Only acknowledged entries leave the input stream
+        pipe.xdel(INPUT_STREAM, *entry_ids)
+        pipe.execute()
+
+    return len(entries)
@@ -1,17 +1,79 @@
-from typing import Annotated
+from contextlib import contextmanager
+from typing import Annotated, Iterator
 
 from fastapi import Depends
-from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .config import settings
 
-engine = create_engine(settings.database_url)
+engine = create_async_engine(
+    settings.async_database_url,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_pre_ping=True,
+)
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+# expire_on_commit=False: attributes can't be lazy-loaded under asyncio,
+# so objects returned from a service must stay usable after commit()
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
-def get_session():
-    with Session(engine) as session:
+# Synchronous engine for Celery workers. Each prefork child builds its own in
+# worker_process_init; anything else gets one lazily on first use
+_sync_engine = None
+
+def init_sync_engine():
+    global _sync_engine
+    _sync_engine = create_engine(
+        settings.database_url,
+        pool_size=settings.worker_db_pool_size,
+        max_overflow=settings.worker_db_max_overflow,
+        pool_recycle=settings.worker_db_pool_recycle,
+        pool_pre_ping=True,
+    )
+    return _sync_engine
+
+def dispose_sync_engine(close: bool = True):
+    # close=False drops pooled connections without closing them, for a forked
+    # child whose connections still belong to the parent
+    global _sync_engine
+    if _sync_engine is not None:
+        _sync_engine.dispose(close=close)
+        _sync_engine = None
+
+def get_sync_engine():
+    if _sync_engine is None:
+        return init_sync_engine()
+    return _sync_engine
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    Sync session for Celery tasks: commits when the block succeeds, rolls back
+    when it raises. Objects stay usable after the block.
+    """
+    with Session(get_sync_engine(), expire_on_commit=False) as session:
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+async def create_db_and_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+async def get_session():
+    async with async_session() as session:
         yield session
 
-SessionDep = Annotated[Session, Depends(get_session)]
+def get_session_factory():
+    # For streaming responses: yield-dependencies are closed before the body is
+    # sent, so the generator has to open (and own) its session
+    return async_session
+
+SessionDep = Annotated[AsyncSession, Depends(get_session)]
+SessionFactoryDep = Annotated[async_sessionmaker, Depends(get_session_factory)]
@@ -0,0 +1,61 @@
+"""
+Registers the data sources fetched by the daily ingestion job:
+
+    python -m src.ingestion.cli add weather https://example.com/weather.ndjson
+    python -m src.ingestion.cli disable weather
+    python -m src.ingestion.cli list
+"""
+import argparse
+from typing import List, Optional
+
+from sqlmodel import Session, select
+
+from src.database import session_scope
+from src.ingestion.models import DataSource
+
+def add_source(db: Session, name: str, url: str) -> DataSource:
+    """
+    Registers a source, or points an existing one with the same name at `url`
+    and enables it again. A new URL starts over without stored validators.
+    """
+    source = db.exec(select(DataSource).where(DataSource.name == name)).first()
+    if source is None:
+        source = DataSource(name=name, url=url)
+    elif source.url != url:
+        source.url, source.etag, source.last_modified = url, None, None
+    source.enabled = True
+    db.add(source)
+    db.flush()
+    return source
+
+def set_enabled(db: Session, name: str, enabled: bool) -> Optional[DataSource]:
+    source = db.exec(select(DataSource).where(DataSource.name == name)).first()
+    if source is not None:
+        source.enabled = enabled
+        db.add(source)
+    return source
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(description="Manage the data sources of the ingestion job.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="register a source or change its URL")
+    add.add_argument("name")
+    add.add_argument("url")
+    for command in ("enable", "disable"):
+        commands.add_parser(command, help=f"{command} a source").add_argument("name")
+    commands.add_parser("list", help="show every source and its last fetch")
+    options = parser.parse_args(args)
+
+    with session_scope() as db:
+        if options.command == "add":
+            source = add_source(db, options.name, options.url)
+            print(f"{source.name}: {source.url}")
+        elif options.command == "list":
+            for source in db.exec(select(DataSource).order_by(DataSource.name)).all():
+                state = "enabled" if source.enabled else "disabled"
+                print(f"{source.name}\t{state}\t{source.url}\t{source.last_status or '-'}\t{source.last_fetched_at or 'never'}")
+        elif set_enabled(db, options.name, options.command == "enable") is None:
+            parser.exit(1, f"No data source named {options.name}\n")
+
+if __name__ == "__main__":
+    main()
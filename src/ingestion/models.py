@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import JSON, Column, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+
+class DataSource(SQLModel, table=True):
+    """
+    An external NDJSON feed fetched by the daily ingestion job. The validators
+    of the last full fetch are sent back on the next one, so an unchanged feed
+    costs a 304 instead of a download.
+    """
+    __tablename__ = "data_source"
+
+    id: int | None = Field(default=None, primary_key=True)
+    name: str = Field(max_length=100, unique=True)
+    url: str = Field(max_length=2048)
+    enabled: bool = Field(default=True)
+    etag: Optional[str] = Field(default=None, max_length=255)
+    # Kept exactly as the server sent it, for If-Modified-Since
+    last_modified: Optional[str] = Field(default=None, max_length=64)
+    last_fetched_at: Optional[datetime] = Field(default=None)
+    last_status: Optional[int] = Field(default=None)
+    last_error: Optional[str] = Field(default=None, max_length=500)
+
+class ExternalRecord(SQLModel, table=True):
+    __tablename__ = "external_record"
+    __table_args__ = (
+        # Upsert target: a record is identified by its id within its source
+        UniqueConstraint("source_id", "external_id", name="uq_external_record_source_id_external_id"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    source_id: int = Field(foreign_key="data_source.id")
+    external_id: str = Field(max_length=255)
+    data: Any = Field(sa_column=Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False))
+    fetched_at: datetime = Field()
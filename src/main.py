@@ -1,21 +1,38 @@
-from fastapi import FastAPI, HTTPException
+from typing import Annotated
+
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 
 from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 
-from src.database import create_db_and_tables, SessionDep
-from src.redis import check_redis_connection
+from src.auth.cache import principal_cache
+from src.auth.models import User
+from src.auth.service import get_current_active_user
+from src.auth.hashing import password_hasher
+from src.database import create_db_and_tables, engine, SessionDep
+from src.redis import async_redis, check_redis_connection, redis_stats, result_backend_redis
 
 from src.config import settings
+from src.tasks.cache import task_list_cache
 from src.tasks.controller import router as tasks_router
+from src.tasks.events import task_event_hub
+from src.tasks.job_status import job_status_hub
 from src.auth.controller import router as auth_router
+# Not used by any route, imported so create_db_and_tables creates its tables
+import src.ingestion.models  # pylint: disable=unused-import
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_db_and_tables()
+    await create_db_and_tables()
     yield
+    await task_event_hub.close()
+    await job_status_hub.close()
+    await engine.dispose()
+    await async_redis.aclose()
+    await result_backend_redis.aclose()
+    password_hasher.shutdown()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -26,11 +43,11 @@ def read_root():
 @app.get("/health")
 async def health(db: SessionDep):
     try:
-        db.execute(text("SELECT 1"))
+        await db.exec(text("SELECT 1"))
     except OperationalError:
         raise HTTPException(status_code=500, detail="Database connection failed")
 
-    redis_connection_status = "connected" if check_redis_connection() else "disconnected"
+    redis_connection_status = "connected" if await check_redis_connection() else "disconnected"
 
     return {
         "status": "OK",
@@ -38,6 +55,18 @@ async def health(db: SessionDep):
         "redis": redis_connection_status,
     }
 
+@app.get("/stats")
+async def stats(current_user: Annotated[User, Depends(get_current_active_user)]):
+    # Cache, hasher and Redis internals are not for anonymous callers
+    return {
+        "password_hasher": password_hasher.stats(),
+        "principal_cache": principal_cache.stats(),
+        "task_list_cache": task_list_cache.stats(),
+        "task_events": task_event_hub.stats(),
+        "job_status": job_status_hub.stats(),
+        "redis": redis_stats.stats(),
+    }
+
 app.include_router(tasks_router)
 app.include_router(auth_router)
 app.mount("/", StaticFiles(directory="src/static", html=True), name="static")
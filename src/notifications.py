@@ -0,0 +1,230 @@
+import logging
+import time
+from typing import Callable, Iterable, List, Tuple
+from uuid import uuid4
+
+from src.celery import celery_app
+from src.config import settings
+from src.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Appends a message to the recipient's buffer and, in the same atomic step,
+# makes sure the recipient is due for a flush in DUE_KEY:
+#   -1  buffer full, message rejected
+#    0  queued, flushed within a window
+#    1  buffer holds a full batch, due now
+_ENQUEUE_SCRIPT = """
+if redis.call('LLEN', KEYS[1]) >= tonumber(ARGV[2]) then
+    return -1
+end
+local length = redis.call('RPUSH', KEYS[1], ARGV[1])
+if length >= tonumber(ARGV[3]) then
+    local due = redis.call('ZSCORE', KEYS[2], ARGV[4])
+    if not due or tonumber(due) > tonumber(ARGV[5]) then
+        redis.call('ZADD', KEYS[2], ARGV[5], ARGV[4])
+    end
+    return 1
+end
+redis.call('ZADD', KEYS[2], 'NX', ARGV[6], ARGV[4])
+return 0
+"""
+
+# Leases up to ARGV[3] due recipients to the caller's token. A claimed
+# recipient is pushed back by the lease, so it is flushed again if the caller
+# dies before releasing it; the lease key keeps others off it meanwhile.
+# Recipients leased by another flusher stay due and are skipped, so the scan
+# moves past them instead of stopping at the first page.
+_CLAIM_SCRIPT = """
+local claimed = {}
+local limit = tonumber(ARGV[3])
+local skipped = 0
+while #claimed < limit do
+    local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', skipped, limit - #claimed)
+    if #due == 0 then
+        break
+    end
+    for _, recipient in ipairs(due) do
+        if redis.call('SET', ARGV[4] .. recipient, ARGV[6], 'NX', 'PX', ARGV[5]) then
+            redis.call('ZADD', KEYS[1], ARGV[2], recipient)
+            table.insert(claimed, recipient)
+        else
+            skipped = skipped + 1
+        end
+    end
+end
+return claimed
+"""
+
+# Drops the ARGV[1] delivered messages and ends the lease. A lease that ran
+# out and went to another flusher is left alone, since that flusher is
+# delivering the same messages. A buffer that isn't empty stays due at ARGV[2]
+# (or earlier); an empty one leaves DUE_KEY.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[3]) ~= ARGV[4] then
+    return redis.call('LLEN', KEYS[1])
+end
+redis.call('LTRIM', KEYS[1], ARGV[1], -1)
+redis.call('DEL', KEYS[3])
+local remaining = redis.call('LLEN', KEYS[1])
+if remaining == 0 then
+    redis.call('ZREM', KEYS[2], ARGV[3])
+else
+    local due = redis.call('ZSCORE', KEYS[2], ARGV[3])
+    if not due or tonumber(due) > tonumber(ARGV[2]) then
+        redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3])
+    end
+end
+return remaining
+"""
+
+FLUSH_TASK = "src.celery_tasks.flush_notifications"
+DUE_KEY = "notify:due"
+# Held while an early flush is queued, so a burst of full buffers sends one task
+KICK_KEY = "notify:flush:kick"
+
+class NotificationBufferFull(Exception):
+    pass
+
+class NotificationBatcher:
+    """
+    Buffers notifications per recipient in Redis and delivers each buffer as
+    one coalesced send.
+
+    Producers call enqueue() or enqueue_many() directly. A buffer is due for
+    delivery `window` seconds after its first message, or at once when it
+    reaches `batch_size` messages. flush_due() delivers every due buffer; it
+    runs from the periodic flush_notifications task, which a full buffer also
+    starts early. A buffer holding `buffer_limit` messages rejects further
+    ones with NotificationBufferFull, so producers slow down instead of
+    growing Redis without bound.
+
+    Delivery is at least once: a batch is only removed from its buffer after
+    it was delivered, so a failed delivery is retried a window later, and a
+    flusher that dies mid-delivery leaves the batch to be sent again once its
+    `lease` runs out. Recipients may therefore see a batch twice, never lose one.
+    """
+
+    def __init__(self, client, batch_size: int, window: float, buffer_limit: int, lease: float = 30.0, clock=time.time):
+        self.client = client
+        self.batch_size = batch_size
+        self.window = window
+        self.buffer_limit = buffer_limit
+        self.lease = lease
+        self.clock = clock
+        self._enqueue = client.register_script(_ENQUEUE_SCRIPT)
+        self._claim = client.register_script(_CLAIM_SCRIPT)
+        self._release = client.register_script(_RELEASE_SCRIPT)
+
+    @staticmethod
+    def _buffer_key(recipient: str) -> str:
+        return f"notify:buffer:{recipient}"
+
+    @staticmethod
+    def _lease_key(recipient: str) -> str:
+        return f"notify:lease:{recipient}"
+
+    def _kick(self):
+        if self.client.set(KICK_KEY, "1", nx=True, px=max(int(self.window * 1000), 1)):
+            celery_app.send_task(FLUSH_TASK)
+
+    def _enqueue_args(self, recipient: str, message: str, now: float) -> dict:
+        return {
+            "keys": [self._buffer_key(recipient), DUE_KEY],
+            "args": [message, self.buffer_limit, self.batch_size, recipient, now, now + self.window],
+        }
+
+    def enqueue(self, recipient: str, message: str):
+        action = self._enqueue(**self._enqueue_args(recipient, message, self.clock()))
+        if action == -1:
+            raise NotificationBufferFull(f"Notification buffer for {recipient} is full")
+        if action == 1:
+            self._kick()
+
+    def enqueue_many(self, notifications: Iterable[Tuple[str, str]]) -> List[str]:
+        """
+        Enqueues (recipient, message) pairs in one round trip. Returns the
+        recipients whose buffer was full instead of raising.
+        """
+        notifications = list(notifications)
+        now = self.clock()
+        with self.client.pipeline(transaction=False) as pipe:
+            for recipient, message in notifications:
+                self._enqueue(**self._enqueue_args(recipient, message, now), client=pipe)
+            actions = pipe.execute()
+
+        if 1 in actions:
+            self._kick()
+        return [recipient for (recipient, _), action in zip(notifications, actions) if action == -1]
+
+    def claim(self, token: str, limit: int = 100) -> List[str]:
+        """
+        Leases up to `limit` recipients whose buffer is due to `token`.
+        """
+        now = self.clock()
+        return self._claim(
+            keys=[DUE_KEY],
+            args=[now, now + self.lease, limit, self._lease_key(""), max(int(self.lease * 1000), 1), token],
+        )
+
+    def release(self, recipient: str, token: str, delivered: int, retry_in: float = 0) -> int:
+        """
+        Ends the lease on a claimed recipient, dropping the first `delivered`
+        messages of its buffer. Returns how many are left; they are due again
+        after `retry_in` seconds.
+        """
+        return self._release(
+            keys=[self._buffer_key(recipient), DUE_KEY, self._lease_key(recipient)],
+            args=[delivered, self.clock() + retry_in, recipient, token],
+        )
+
+    def flush(self, recipient: str, token: str, deliver: Callable[[str, List[str]], object]) -> int:
+        """
+        Delivers one batch of a recipient claimed with `token` and returns its
+        size. The batch stays buffered until `deliver` returns.
+        """
+        messages = self.client.lrange(self._buffer_key(recipient), 0, self.batch_size - 1)
+        if messages:
+            try:
+                deliver(recipient, messages)
+            except Exception:
+                self.release(recipient, token, 0, retry_in=self.window)
+                raise
+        self.release(recipient, token, len(messages))
+        return len(messages)
+
+    def flush_due(self, deliver: Callable[[str, List[str]], object], limit: int = 100) -> dict:
+        """
+        Delivers due buffers until none is left, one batch per recipient at a
+        time. A recipient with a backlog stays due and comes round again.
+        """
+        token = uuid4().hex
+        totals = {"recipients": 0, "sent": 0, "failed": 0}
+        while recipients := self.claim(token, limit):
+            for recipient in recipients:
+                try:
+                    sent = self.flush(recipient, token, deliver)
+                except Exception as e:
+                    logger.error(f"Delivering notifications to {recipient} failed: {e}")
+                    totals["failed"] += 1
+                    continue
+                totals["recipients"] += 1
+                totals["sent"] += sent
+        return totals
+
+def deliver_notifications(recipient: str, messages: List[str]) -> str:
+    """
+    Sends a batch of notifications to one recipient as a single message.
+    """
+    logger.info(f"Sending {len(messages)} notification(s) to {recipient}")
+    # Simulate notification sending
+    time.sleep(1)
+    return "\n".join(messages)
+
+notification_batcher = NotificationBatcher(
+    redis_client,
+    batch_size=settings.notification_batch_size,
+    window=settings.notification_batch_window,
+    buffer_limit=settings.notification_buffer_limit,
+    lease=settings.notification_flush_lease,
+)
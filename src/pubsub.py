@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator, Callable, Dict, Set
+
+from redis import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Sent to every local subscriber after the subscription had to be re-established,
+# since messages published in the meantime are lost
+RESYNC_MESSAGE = json.dumps({"resync": True}, separators=(",", ":"))
+
+class PubSubHub:
+    """
+    Multiplexes one Redis subscriber connection across many local listeners.
+
+    The worker subscribes to `{prefix}{key}` when the first listener for a key
+    arrives and unsubscribes when the last one leaves, so Redis only sends it
+    the channels someone here is waiting on. Each message is routed to the
+    in-memory queues registered for its key, so an idle listener costs a small
+    queue and no Redis connection. Queues are bounded: a slow listener loses
+    its oldest messages.
+    """
+
+    def __init__(self, prefix: str, queue_size: int, connect: Callable, reconnect_delay: float = 1.0):
+        self.prefix = prefix
+        self.queue_size = queue_size
+        self.connect = connect
+        self.reconnect_delay = reconnect_delay
+        self._loop = None
+        self._listener = None
+        self._pubsub = None
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._received = 0
+        self._delivered = 0
+        self._dropped = 0
+        self._errors = 0
+
+    def _ensure_listener(self):
+        # Like asyncio primitives, the listener belongs to the loop it was started on
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._listener = None
+            self._pubsub = None
+            self._subscribers = {}
+        if self._listener is None or self._listener.done():
+            self._listener = loop.create_task(self._listen())
+
+    def _stop_listener(self):
+        # Nobody is listening any more, so close the connection rather than hold
+        # an empty subscription open; the next subscriber starts a new listener
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        self._pubsub = None
+
+    def _channels(self) -> Set[str]:
+        return {f"{self.prefix}{key}" for key in self._subscribers}
+
+    async def _listen(self):
+        failed = False
+        # Cancelled by subscribe() when its last listener leaves, and gives up
+        # on reconnecting once nobody is left
+        while self._subscribers:
+            pubsub = self.connect()
+            try:
+                channels = self._channels()
+                await pubsub.subscribe(*channels)
+                # From here on subscribe() changes the subscription itself, after
+                # catching up with the keys that came or went in the meantime
+                self._pubsub = pubsub
+                current = self._channels()
+                if current - channels:
+                    await pubsub.subscribe(*(current - channels))
+                if channels - current:
+                    await pubsub.unsubscribe(*(channels - current))
+                if failed:
+                    self._broadcast(RESYNC_MESSAGE)
+                    failed = False
+
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+                    if message is not None:
+                        self._dispatch(message["channel"], message["data"])
+            except RedisError as e:
+                logger.warning(f"Subscription to {self.prefix}* failed: {e}")
+                self._errors += 1
+                failed = True
+            finally:
+                # A listener that was stopped may finish after its successor started
+                if self._pubsub is pubsub:
+                    self._pubsub = None
+                await pubsub.aclose()
+
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _change_subscription(self, command: str, keys):
+        # Without a connection the listener subscribes to every current key
+        # when it (re)connects, so there is nothing to do here
+        pubsub = self._pubsub
+        if pubsub is None or not keys:
+            return
+        try:
+            await getattr(pubsub, command)(*(f"{self.prefix}{key}" for key in keys))
+        except RedisError as e:
+            # The listener sees the broken connection too and resubscribes
+            logger.warning(f"Changing the subscription to {self.prefix}* failed: {e}")
+            self._errors += 1
+
+    def _offer(self, queue: asyncio.Queue, data):
+        if queue.full():
+            queue.get_nowait()
+            self._dropped += 1
+        queue.put_nowait(data)
+        self._delivered += 1
+
+    def _dispatch(self, channel, data):
+        self._received += 1
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        for queue in self._subscribers.get(channel[len(self.prefix):], ()):
+            self._offer(queue, data)
+
+    def _broadcast(self, data):
+        for queue in {queue for queues in self._subscribers.values() for queue in queues}:
+            self._offer(queue, data)
+
+    @asynccontextmanager
+    async def subscribe(self, *keys: str) -> AsyncIterator[asyncio.Queue]:
+        """
+        One queue receiving the messages of every channel `{prefix}{key}`.
+        """
+        self._ensure_listener()
+
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        added = []
+        for key in keys:
+            queues = self._subscribers.setdefault(key, set())
+            if not queues:
+                added.append(key)
+            queues.add(queue)
+        try:
+            await self._change_subscription("subscribe", added)
+            yield queue
+        finally:
+            removed = []
+            for key in keys:
+                queues = self._subscribers.get(key)
+                if queues is not None:
+                    queues.discard(queue)
+                    if not queues:
+                        del self._subscribers[key]
+                        removed.append(key)
+            if self._subscribers:
+                await self._change_subscription("unsubscribe", removed)
+            else:
+                self._stop_listener()
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._subscribers),
+            "listeners": len({queue for queues in self._subscribers.values() for queue in queues}),
+            "received": self._received,
+            "delivered": self._delivered,
+            "dropped": self._dropped,
+            "errors": self._errors,
+        }
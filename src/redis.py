@@ -1,26 +1,146 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
 import redis
+from redis import RedisError
+from redis import asyncio as redis_asyncio
 from src.config import settings
 
+# Synchronous client for Celery workers and other code outside the event loop
 redis_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
 
-def check_redis_connection():
+def _command_pool(url: str, **kwargs) -> redis_asyncio.BlockingConnectionPool:
+    # Blocking pool: when all connections are busy, callers wait up to
+    # `timeout` for one instead of opening more connections to Redis
+    return redis_asyncio.BlockingConnectionPool.from_url(
+        url,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout,
+        socket_connect_timeout=settings.redis_command_timeout,
+        **kwargs,
+    )
+
+async_redis = redis_asyncio.Redis(connection_pool=_command_pool(settings.redis_url, decode_responses=True))
+
+# Celery result metadata is read as raw bytes and decoded by the result backend,
+# which knows the serializer it was stored with
+result_backend_redis = redis_asyncio.Redis(connection_pool=_command_pool(settings.celery_result_backend))
+
+# Pub/sub connections wait on the server indefinitely, so they live outside the
+# command pools and are not subject to command timeouts
+_pubsub_redis = redis_asyncio.Redis.from_url(settings.redis_url, decode_responses=True)
+_result_pubsub_redis = redis_asyncio.Redis.from_url(settings.celery_result_backend)
+
+class RedisStats:
+    """
+    Per-command call counts and latencies of the async client.
+    """
+
+    def __init__(self):
+        self._commands: Dict[str, dict] = {}
+
+    def record(self, command: str, seconds: float, error: Optional[str] = None):
+        entry = self._commands.setdefault(
+            command, {"calls": 0, "errors": 0, "timeouts": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+        )
+        entry["calls"] += 1
+        entry["total_seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        if error == "timeout":
+            entry["timeouts"] += 1
+        elif error is not None:
+            entry["errors"] += 1
+
+    def stats(self) -> dict:
+        return {
+            command: {
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "timeouts": entry["timeouts"],
+                "avg_ms": round(entry["total_seconds"] / entry["calls"] * 1000, 2),
+                "max_ms": round(entry["max_seconds"] * 1000, 2),
+            }
+            for command, entry in self._commands.items()
+        }
+
+redis_stats = RedisStats()
+
+async def _call(command: str, awaitable: Awaitable):
+    """
+    Runs one Redis round trip under the per-command timeout and records its latency.
+    A timeout is raised as redis.TimeoutError, so callers only handle RedisError.
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        return await asyncio.wait_for(awaitable, timeout=settings.redis_command_timeout)
+    except asyncio.TimeoutError:
+        error = "timeout"
+        raise redis.TimeoutError(f"Redis {command} timed out after {settings.redis_command_timeout}s")
+    except RedisError as e:
+        error = type(e).__name__
+        raise
+    finally:
+        redis_stats.record(command, time.perf_counter() - started, error)
+
+async def check_redis_connection() -> bool:
     try:
-        redis_client.ping()
+        await _call("ping", async_redis.ping())
         return True
-    except redis.ConnectionError:
+    except RedisError:
         return False
 
 async def set_value(key: str, value: str, expire: int = None):
-    if expire:
-        await redis_client.setex(key, expire, value)
-    else:
-        await redis_client.set(key, value)
+    await _call("set", async_redis.set(key, value, ex=expire or None))
 
 async def get_value(key: str):
-    return redis_client.get(key)
+    return await _call("get", async_redis.get(key))
 
 async def delete_key(key: str):
-    return redis_client.delete(key)
+    return await _call("delete", async_redis.delete(key))
 
 async def exists(key: str):
-    return redis_client.exists(key)
\ No newline at end of file
+    return await _call("exists", async_redis.exists(key))
+
+async def mget_values(*keys: str) -> list:
+    return await _call("mget", async_redis.mget(keys))
+
+async def mset_values(mapping: Dict[str, str], expire: int = None):
+    if not expire:
+        await _call("mset", async_redis.mset(mapping))
+        return
+
+    # MSET can't set a TTL, so send one SET EX per key in a single round trip
+    def send(pipe):
+        for key, value in mapping.items():
+            pipe.set(key, value, ex=expire)
+
+    await run_pipeline(send, name="mset")
+
+async def set_if_absent(key: str, value: str) -> bool:
+    return bool(await _call("set", async_redis.set(key, value, nx=True)))
+
+async def incr(key: str) -> int:
+    return await _call("incr", async_redis.incr(key))
+
+async def publish(channel: str, message: str) -> int:
+    return await _call("publish", async_redis.publish(channel, message))
+
+async def run_pipeline(build: Callable, transaction: bool = False, name: str = "pipeline") -> List:
+    """
+    Queues commands with `build(pipe)` and sends them in one round trip.
+    Returns one result per queued command.
+    """
+    async with async_redis.pipeline(transaction=transaction) as pipe:
+        build(pipe)
+        return await _call(name, pipe.execute())
+
+async def mget_results(keys: List[bytes]) -> List[Optional[bytes]]:
+    return await _call("result_mget", result_backend_redis.mget(keys))
+
+def create_pubsub():
+    return _pubsub_redis.pubsub(ignore_subscribe_messages=True)
+
+def create_result_pubsub():
+    return _result_pubsub_redis.pubsub(ignore_subscribe_messages=True)
@@ -0,0 +1,71 @@
+"""
+msgpack serializer for Celery messages and results, compressed with zlib above
+a size threshold.
+
+Every payload starts with one header byte saying whether the rest is
+compressed, so small messages skip the compression cost. Datetimes, UUIDs and
+Decimals round-trip as msgpack extension types, as they do with kombu's JSON.
+"""
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+import msgpack
+from kombu.serialization import register
+
+from src.config import settings
+
+SERIALIZER = "msgpack-zlib"
+CONTENT_TYPE = "application/x-msgpack-zlib"
+
+_PLAIN = b"\x00"
+_ZLIB = b"\x01"
+
+_DATETIME = 1
+_DATE = 2
+_UUID = 3
+_DECIMAL = 4
+
+def _default(obj):
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, date):
+        return msgpack.ExtType(_DATE, obj.isoformat().encode())
+    if isinstance(obj, UUID):
+        return msgpack.ExtType(_UUID, obj.bytes)
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(_DECIMAL, str(obj).encode())
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+def _ext_hook(code: int, data: bytes):
+    if code == _DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == _DATE:
+        return date.fromisoformat(data.decode())
+    if code == _UUID:
+        return UUID(bytes=data)
+    if code == _DECIMAL:
+        return Decimal(data.decode())
+    return msgpack.ExtType(code, data)
+
+def dumps(obj, threshold: int = None) -> bytes:
+    threshold = settings.celery_compression_threshold if threshold is None else threshold
+    packed = msgpack.packb(obj, default=_default, use_bin_type=True)
+    if len(packed) >= threshold:
+        compressed = zlib.compress(packed, settings.celery_compression_level)
+        # Already dense payloads can grow, those stay as they are
+        if len(compressed) < len(packed):
+            return _ZLIB + compressed
+    return _PLAIN + packed
+
+def loads(data: bytes):
+    header, body = data[:1], data[1:]
+    if header == _ZLIB:
+        body = zlib.decompress(body)
+    elif header != _PLAIN:
+        raise ValueError(f"Unknown {SERIALIZER} header {header!r}")
+    return msgpack.unpackb(body, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+def register_serializer():
+    register(SERIALIZER, dumps, loads, content_type=CONTENT_TYPE, content_encoding="binary")
@@ -0,0 +1,112 @@
+import logging
+import time
+from typing import Awaitable, Callable, Iterable, List
+from uuid import UUID
+
+from pydantic import TypeAdapter
+from redis import RedisError
+
+from src.config import settings
+from src.redis import get_value, mget_values, redis_client, run_pipeline, set_if_absent, set_value
+from src.tasks.models import Task
+
+logger = logging.getLogger(__name__)
+
+task_list_adapter = TypeAdapter(List[Task])
+
+class TaskListCache:
+    """
+    Read-through cache of each user's serialized task list.
+
+    Every mutation bumps a per-user version counter, and a cached list is stored
+    together with the version it was built from. Readers fetch both keys in one
+    MGET and only serve the list when the versions match, so a list loaded before
+    a mutation is never returned after it.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+
+    @staticmethod
+    def _version_key(user_id: UUID) -> str:
+        return f"tasks:version:{user_id}"
+
+    @staticmethod
+    def _list_key(user_id: UUID) -> str:
+        return f"tasks:list:{user_id}"
+
+    async def _current_version(self, user_id: UUID) -> str:
+        # Seed a missing counter with a unique value, so an evicted counter can
+        # never come back at a version that an old cached list was built for
+        version = str(time.time_ns())
+        if await set_if_absent(self._version_key(user_id), version):
+            return version
+        return await get_value(self._version_key(user_id))
+
+    async def get_or_load(self, user_id: UUID, loader: Callable[[], Awaitable[List[Task]]]) -> str:
+        try:
+            version, cached = await mget_values(self._version_key(user_id), self._list_key(user_id))
+            if version is None:
+                version = await self._current_version(user_id)
+        except RedisError as e:
+            logger.warning(f"Task list cache read failed: {e}")
+            self._errors += 1
+            return task_list_adapter.dump_json(await loader()).decode()
+
+        if cached is not None:
+            cached_version, _, payload = cached.partition(":")
+            if cached_version == version:
+                self._hits += 1
+                return payload
+
+        self._misses += 1
+        payload = task_list_adapter.dump_json(await loader()).decode()
+
+        try:
+            await set_value(self._list_key(user_id), f"{version}:{payload}", expire=self.ttl)
+        except RedisError as e:
+            logger.warning(f"Task list cache write failed: {e}")
+            self._errors += 1
+
+        return payload
+
+    def _queue_bump(self, pipe, user_id: UUID):
+        # A bare INCR would recreate an evicted counter at 1, which can repeat a
+        # version an old cached list was built for; seed it as _current_version does
+        key = self._version_key(user_id)
+        pipe.set(key, str(time.time_ns()), nx=True)
+        pipe.incr(key)
+
+    async def bump(self, user_id: UUID):
+        try:
+            await run_pipeline(lambda pipe: self._queue_bump(pipe, user_id), name="incr")
+        except RedisError as e:
+            logger.warning(f"Task list cache invalidation failed: {e}")
+            self._errors += 1
+
+    def bump_sync(self, user_id: UUID):
+        # For Celery workers, which write tasks outside the request path
+        self.bump_many_sync([user_id])
+
+    def bump_many_sync(self, user_ids: Iterable[UUID]):
+        # One round trip for a whole batch of users
+        try:
+            with redis_client.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    self._queue_bump(pipe, user_id)
+                pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Task list cache invalidation failed: {e}")
+            self._errors += 1
+
+    def stats(self) -> dict:
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "errors": self._errors,
+        }
+
+task_list_cache = TaskListCache(ttl=settings.task_list_cache_ttl)
@@ -1,29 +1,210 @@
-from typing import Annotated, List
+from datetime import timedelta
+from typing import Annotated, List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Response, UploadFile, WebSocket, status
+from fastapi.responses import StreamingResponse
 from fastapi.params import Depends, Body
-from src.auth.service import get_current_active_user
+from src.auth.service import authenticate_token, get_current_active_user
+from src.config import settings
 
-from .service import TaskService
-from .models import Task, TaskCreate
+from .events import serve_websocket, sse_stream, task_event_hub
+from .job_status import get_job_statuses, stream_job_statuses
+from .service import TaskService, gzip_stream, utcnow
+from .models import (
+    JobStatusBatch,
+    JobStatusBatchRequest,
+    Task,
+    TaskBulkRequest,
+    TaskBulkResult,
+    TaskChanges,
+    TaskCreate,
+    TaskDeadlineSummary,
+    TaskPage,
+    TaskUpdate,
+    UTCDatetime,
+)
 from ..auth.models import User
-from ..database import SessionDep
-from src.tasks.tasks import create_random_task
-from src.celery import celery_app
+from ..database import SessionDep, SessionFactoryDep
+from src.tasks.tasks import create_random_task, import_tasks as import_tasks_job
 
 router = APIRouter(prefix="/tasks")
 
 @router.post("/create", response_model=Task, status_code=status.HTTP_201_CREATED)
 async def create_task(task_data: TaskCreate, current_user: Annotated[User, Depends(get_current_active_user)], session: SessionDep):
-    return TaskService.create_task(task_data, current_user, session)
+    return await TaskService.create_task(task_data, current_user, session)
 
 @router.get("/get_all", response_model=List[Task], status_code=status.HTTP_200_OK)
 async def get_tasks(current_user: Annotated[User, Depends(get_current_active_user)], session: SessionDep):
-    return TaskService.get_all_tasks(current_user, session)
+    # Already-serialized JSON from the list cache, so skip response_model validation
+    return Response(
+        content=await TaskService.get_all_tasks_json(current_user, session),
+        media_type="application/json",
+    )
+
+@router.get("/list", response_model=TaskPage, status_code=status.HTTP_200_OK)
+async def list_tasks(
+        current_user: Annotated[User, Depends(get_current_active_user)],
+        session: SessionDep,
+        limit: Annotated[int, Query(ge=1, le=200)] = 50,
+        after: Optional[str] = None,
+        completed: Optional[bool] = None,
+        deadline_from: Optional[UTCDatetime] = None,
+        deadline_to: Optional[UTCDatetime] = None,
+):
+    tasks, next_cursor = await TaskService.list_tasks(
+        current_user,
+        session,
+        limit=limit,
+        after=after,
+        completed=completed,
+        deadline_from=deadline_from,
+        deadline_to=deadline_to,
+    )
+    return TaskPage(items=tasks, next_cursor=next_cursor)
+
+@router.get("/changes", response_model=TaskChanges, status_code=status.HTTP_200_OK)
+async def get_task_changes(
+        current_user: Annotated[User, Depends(get_current_active_user)],
+        session: SessionDep,
+        since: Annotated[int, Query(ge=0)] = 0,
+):
+    return await TaskService.get_changes(current_user, session, since=since)
+
+@router.get("/events", status_code=status.HTTP_200_OK)
+async def stream_task_events(current_user: Annotated[User, Depends(get_current_active_user)]):
+    return StreamingResponse(
+        sse_stream(task_event_hub, current_user.id, keepalive=settings.task_events_keepalive),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/events/ws")
+async def task_events_websocket(websocket: WebSocket, session_factory: SessionFactoryDep, token: str):
+    # Browsers can't set headers on a WebSocket handshake, so the token comes in the query.
+    # The session is only held for authentication, not for the life of the connection
+    async with session_factory() as session:
+        try:
+            user = await authenticate_token(token, session)
+        except HTTPException:
+            user = None
+
+    if user is None or user.disabled:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    await serve_websocket(task_event_hub, websocket, user.id)
+
+@router.post("/bulk", response_model=TaskBulkResult, status_code=status.HTTP_200_OK)
+async def bulk_tasks(bulk_data: TaskBulkRequest, current_user: Annotated[User, Depends(get_current_active_user)], session: SessionDep):
+    return await TaskService.bulk_apply(bulk_data, current_user, session)
+
+@router.get("/due", response_model=TaskPage, status_code=status.HTTP_200_OK)
+async def get_due_tasks(
+        current_user: Annotated[User, Depends(get_current_active_user)],
+        session: SessionDep,
+        hours: Annotated[int, Query(ge=1, le=24 * 365)] = 24,
+        limit: Annotated[int, Query(ge=1, le=200)] = 50,
+        after: Optional[str] = None,
+):
+    now = utcnow()
+    tasks, next_cursor = await TaskService.list_open_by_deadline(
+        current_user, session, deadline_from=now, deadline_to=now + timedelta(hours=hours), limit=limit, after=after
+    )
+    return TaskPage(items=tasks, next_cursor=next_cursor)
+
+@router.get("/due/summary", response_model=TaskDeadlineSummary, status_code=status.HTTP_200_OK)
+async def get_deadline_summary(
+        current_user: Annotated[User, Depends(get_current_active_user)],
+        session: SessionDep,
+        hours: Annotated[int, Query(ge=1, le=24 * 365)] = 24,
+):
+    return await TaskService.get_deadline_summary(current_user, session, window_hours=hours)
+
+@router.get("/overdue", response_model=TaskPage, status_code=status.HTTP_200_OK)
+async def get_overdue_tasks(
+        current_user: Annotated[User, Depends(get_current_active_user)],
+        session: SessionDep,
+        limit: Annotated[int, Query(ge=1, le=200)] = 50,
+        after: Optional[str] = None,
+):
+    tasks, next_cursor = await TaskService.list_open_by_deadline(
+        current_user, session, deadline_to=utcnow(), limit=limit, after=after
+    )
+    return TaskPage(items=tasks, next_cursor=next_cursor)
+
+@router.get("/search", response_model=TaskPage, status_code=status.HTTP_200_OK)
+async def search_tasks(
+        current_user: Annotated[User, Depends(get_current_active_user)],
+        session: SessionDep,
+        q: Annotated[str, Query(min_length=1, max_length=200)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        after: Optional[str] = None,
+):
+    tasks, next_cursor = await TaskService.search_tasks(current_user, session, q, limit=limit, after=after)
+    return TaskPage(items=tasks, next_cursor=next_cursor)
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_tasks(
+        current_user: Annotated[User, Depends(get_current_active_user)],
+        session_factory: SessionFactoryDep,
+        export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+        gzip: bool = False,
+):
+    async def body():
+        async with session_factory() as session:
+            async for chunk in TaskService.export_tasks(current_user, session, export_format):
+                yield chunk
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="tasks.{export_format}"'}
+
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(gzip_stream(body()), media_type=media_type, headers=headers)
+
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+@router.post("/import", status_code=status.HTTP_202_ACCEPTED)
+async def import_tasks(
+        file: UploadFile,
+        current_user: Annotated[User, Depends(get_current_active_user)],
+        import_format: Annotated[Optional[Literal["ndjson", "csv"]], Query(alias="format")] = None,
+):
+    if import_format is None:
+        import_format = "csv" if (file.filename or "").lower().endswith(".csv") else "ndjson"
+
+    path = await TaskService.save_import_upload(file)
+    try:
+        # A job still queued when the upload sweep removes its file is dropped
+        task_result = import_tasks_job.apply_async(
+            (path, import_format, str(current_user.id)), expires=settings.import_upload_ttl
+        )
+    except Exception as e:
+        await TaskService.discard_import_upload(path)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start import: {str(e)}"
+        )
+
+    return {
+        "message": "Task import started",
+        "celery_task_id": task_result.id,
+        "status": "PENDING"
+    }
 
 @router.put("/update/{task_id}", response_model=Task, status_code=status.HTTP_200_OK)
 async def update_task(task_id: int, task_data: Annotated[TaskCreate, Body()], current_user: Annotated[User, Depends(get_current_active_user)], session: SessionDep):
-    task = TaskService.update_task(task_id, task_data, current_user, session)
+    task = await TaskService.update_task(task_id, task_data, current_user, session)
+
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    return task
+
+@router.patch("/{task_id}", response_model=Task, status_code=status.HTTP_200_OK)
+async def patch_task(task_id: int, task_data: TaskUpdate, current_user: Annotated[User, Depends(get_current_active_user)], session: SessionDep):
+    task = await TaskService.patch_task(task_id, task_data, current_user, session)
 
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -32,7 +213,7 @@ async def update_task(task_id: int, task_data: Annotated[TaskCreate, Body()], cu
 
 @router.delete("/delete/{task_id}", response_model=Task, status_code=status.HTTP_200_OK)
 async def delete_task(task_id: int, current_user: Annotated[User, Depends(get_current_active_user)], session: SessionDep):
-    task = TaskService.delete_task(task_id, current_user, session)
+    task = await TaskService.delete_task(task_id, current_user, session)
 
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -40,9 +221,9 @@ async def delete_task(task_id: int, current_user: Annotated[User, Depends(get_cu
     return task
 
 @router.post("/random-task", status_code=status.HTTP_201_CREATED)
-async def create_random_task(current_user: Annotated[User, Depends(get_current_active_user)], session: SessionDep):
+async def trigger_random_task(current_user: Annotated[User, Depends(get_current_active_user)]):
     try:
-        task_result = create_random_task(current_user, session).delay()
+        task_result = create_random_task.delay(str(current_user.id))
 
         return {
             "message": "Random task creation triggered successfully",
@@ -56,22 +237,52 @@ async def create_random_task(current_user: Annotated[User, Depends(get_current_a
             detail=f"Failed to trigger task: {str(e)}"
         )
 
+@router.get("/task-status/stream", status_code=status.HTTP_200_OK)
+async def stream_task_status(
+        current_user: Annotated[User, Depends(get_current_active_user)],
+        ids: Annotated[List[str], Query(min_length=1)],
+):
+    if len(ids) > settings.job_status_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.job_status_max_ids} ids can be watched at once",
+        )
+
+    return StreamingResponse(
+        stream_job_statuses(list(dict.fromkeys(ids)), refresh_interval=settings.job_status_refresh_interval),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post(
+    "/task-status/batch",
+    response_model=JobStatusBatch,
+    response_model_exclude_none=True,
+    status_code=status.HTTP_200_OK,
+)
+async def get_task_status_batch(
+        batch: JobStatusBatchRequest,
+        current_user: Annotated[User, Depends(get_current_active_user)],
+):
+    if len(batch.ids) > settings.job_status_batch_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may contain at most {settings.job_status_batch_max_ids} ids",
+        )
+
+    # One MGET for the whole batch; repeated ids are looked up once
+    return JobStatusBatch(statuses=await get_job_statuses(list(dict.fromkeys(batch.ids))))
+
 @router.get("/task-status/{task_id}", status_code=status.HTTP_200_OK)
 async def get_task_status(
         task_id: str,
         current_user: Annotated[User, Depends(get_current_active_user)]
 ):
     try:
-        task_result = celery_app.AsyncResult(task_id)
-
-        return {
-            "task_id": task_id,
-            "status": task_result.status,
-            "result": task_result.result if task_result.ready() else None,
-            "info": task_result.info
-        }
+        (task_status,) = await get_job_statuses([task_id])
+        return task_status
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Task not found: {str(e)}"
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Iterable, List, Tuple
+from uuid import UUID
+
+from fastapi import WebSocket
+from redis import RedisError
+
+from src.config import settings
+from src.pubsub import PubSubHub
+from src.redis import create_pubsub, publish, redis_client
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "tasks:events:"
+
+def task_event(version: int, changed: Iterable[int] = (), deleted: Iterable[int] = ()) -> str:
+    """
+    A change notification. Clients pull /tasks/changes?since=<their version>
+    when they see it; the ids are hints for clients that can use them directly.
+    """
+    return json.dumps({"version": version, "changed": list(changed), "deleted": list(deleted)}, separators=(",", ":"))
+
+async def publish_task_event(user_id: UUID, version: int, changed: Iterable[int] = (), deleted: Iterable[int] = ()):
+    try:
+        await publish(f"{CHANNEL_PREFIX}{user_id}", task_event(version, changed, deleted))
+    except RedisError as e:
+        logger.warning(f"Task event publish failed: {e}")
+
+def publish_task_event_sync(user_id: UUID, version: int, changed: Iterable[int] = (), deleted: Iterable[int] = ()):
+    # For Celery workers, which write tasks outside the request path
+    try:
+        redis_client.publish(f"{CHANNEL_PREFIX}{user_id}", task_event(version, changed, deleted))
+    except RedisError as e:
+        logger.warning(f"Task event publish failed: {e}")
+
+def publish_task_events_sync(events: Iterable[Tuple[UUID, int, List[int]]]):
+    # (user_id, version, changed ids) for many users, published in one round trip
+    try:
+        with redis_client.pipeline(transaction=False) as pipe:
+            for user_id, version, changed in events:
+                pipe.publish(f"{CHANNEL_PREFIX}{user_id}", task_event(version, changed))
+            pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Task event publish failed: {e}")
+
+async def sse_stream(hub: PubSubHub, user_id: UUID, keepalive: float) -> AsyncIterator[str]:
+    async with hub.subscribe(str(user_id)) as queue:
+        while True:
+            try:
+                data = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            yield f"data: {data}\n\n"
+
+async def serve_websocket(hub: PubSubHub, websocket: WebSocket, user_id: UUID):
+    async with hub.subscribe(str(user_id)) as queue:
+        async def forward():
+            while True:
+                await websocket.send_text(await queue.get())
+
+        async def receive():
+            # Client messages are ignored, reading is how a disconnect is noticed
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+
+        tasks = [asyncio.create_task(forward()), asyncio.create_task(receive())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+# A slow client only loses old events, which is harmless because clients pull
+# all changes since their own version whenever any event arrives
+task_event_hub = PubSubHub(CHANNEL_PREFIX, queue_size=settings.task_events_queue_size, connect=create_pubsub)
@@ -0,0 +1,113 @@
+import csv
+import io
+from typing import Callable, Iterable, Iterator, Literal, Optional, Tuple, Union
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy.dialects.postgresql import psycopg2
+
+from src.tasks.models import TaskCreate
+from src.tasks.service import next_sync_version_statement
+
+ImportFormat = Literal["csv", "ndjson"]
+
+STAGING_TABLE = "task_import_staging"
+
+def parse_import_rows(lines: Iterable[str], file_format: ImportFormat) -> Iterator[Tuple[int, Union[TaskCreate, str]]]:
+    """
+    Lazily validates an uploaded file against TaskCreate.
+    Yields (row number, TaskCreate) for good rows and (row number, error) for bad ones.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(lines)
+        records = ((reader.line_num, record) for record in reader)
+    else:
+        records = ((number, line) for number, line in enumerate(lines, start=1) if line.strip())
+
+    for number, record in records:
+        try:
+            if file_format == "csv":
+                # Empty cells mean "not set", so an empty deadline is None, not ""
+                data = {key: value for key, value in record.items() if key and value not in ("", None)}
+                yield number, TaskCreate.model_validate(data)
+            else:
+                yield number, TaskCreate.model_validate_json(record)
+        except ValidationError as e:
+            yield number, "; ".join(f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in e.errors())
+
+def _copy_chunk(cursor, rows: list):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row.title, row.deadline.isoformat() if row.deadline else "", row.description])
+    buffer.seek(0)
+
+    cursor.copy_expert(
+        f"COPY {STAGING_TABLE} (title, deadline, description) FROM STDIN "
+        "WITH (FORMAT csv, FORCE_NOT_NULL (title, description))",
+        buffer,
+    )
+
+def import_tasks_file(
+    connection,
+    path: str,
+    file_format: ImportFormat,
+    user_id: UUID,
+    chunk_size: int,
+    on_progress: Optional[Callable[[dict], None]] = None,
+    max_errors: int = 100,
+) -> dict:
+    """
+    Loads a CSV/NDJSON file into `task` for one user through PostgreSQL COPY.
+
+    Valid rows are copied in chunks into a temporary staging table and merged into
+    `task` with a single INSERT ... SELECT, so the whole import is one transaction.
+    `connection` is a raw psycopg2 connection.
+    """
+    progress = {"processed": 0, "imported": 0, "rejected": 0, "errors": []}
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE {STAGING_TABLE} ("
+            "title varchar(100) NOT NULL, deadline timestamp, description varchar(500) NOT NULL"
+            ") ON COMMIT DROP"
+        )
+
+        with open(path, encoding="utf-8", newline="") as file:
+            chunk = []
+            for number, row in parse_import_rows(file, file_format):
+                progress["processed"] += 1
+
+                if isinstance(row, str):
+                    progress["rejected"] += 1
+                    if len(progress["errors"]) < max_errors:
+                        progress["errors"].append({"row": number, "detail": row})
+                    continue
+
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    _copy_chunk(cursor, chunk)
+                    chunk = []
+                    if on_progress:
+                        on_progress(progress)
+
+            if chunk:
+                _copy_chunk(cursor, chunk)
+
+        # Take the change version last, so the user's sync state row is only
+        # locked for the final merge and not for the whole COPY
+        # The ORM write paths' own statement, compiled for the raw psycopg2 cursor
+        statement = next_sync_version_statement("postgresql", str(user_id)).compile(dialect=psycopg2.dialect())
+        cursor.execute(str(statement), statement.params)
+        (version,) = cursor.fetchone()
+
+        cursor.execute(
+            f"INSERT INTO task (title, deadline, description, completed, user_id, version, updated_at) "
+            f"SELECT title, deadline, description, false, %s, %s, timezone('utc', now()) FROM {STAGING_TABLE}",
+            (str(user_id), version),
+        )
+        progress["imported"] = cursor.rowcount
+        progress["version"] = version
+
+    connection.commit()
+    return progress
@@ -0,0 +1,102 @@
+import asyncio
+import json
+from typing import AsyncIterator, List, Optional
+
+from celery import states
+
+from src.celery import celery_app
+from src.config import settings
+from src.pubsub import RESYNC_MESSAGE, PubSubHub
+from src.redis import create_result_pubsub, mget_results
+
+def job_status(task_id: str, meta: Optional[dict]) -> dict:
+    """
+    The same shape /tasks/task-status has always returned, built from a decoded
+    result backend entry (None means Celery has not stored anything yet).
+    """
+    if meta is None:
+        return {"task_id": task_id, "status": states.PENDING, "result": None, "info": None}
+
+    info = meta.get("result")
+    if isinstance(info, BaseException):
+        info = repr(info)
+
+    return {
+        "task_id": task_id,
+        "status": meta["status"],
+        "result": info if meta["status"] in states.READY_STATES else None,
+        "info": info,
+    }
+
+async def get_job_statuses(task_ids: List[str]) -> List[dict]:
+    """
+    Reads the result backend directly with one MGET instead of an AsyncResult per id.
+    """
+    backend = celery_app.backend
+    raw = await mget_results([backend.get_key_for_task(task_id) for task_id in task_ids])
+    return [job_status(task_id, backend.decode_result(value) if value is not None else None) for task_id, value in zip(task_ids, raw)]
+
+async def stream_job_statuses(task_ids: List[str], refresh_interval: float) -> AsyncIterator[str]:
+    """
+    Server-Sent Events with each job's status whenever it changes, ending once
+    every job has finished.
+
+    Celery's Redis backend publishes every stored state on the channel named
+    after the result key, so updates are pushed through the shared subscription.
+    Statuses are also re-read with one MGET every `refresh_interval`, as a
+    fallback for messages lost while the subscription was down or dropped
+    from a full queue.
+    """
+    last = {}
+    pending = set(task_ids)
+
+    def changes(statuses: List[dict]) -> List[dict]:
+        changed = []
+        for status in statuses:
+            if status["task_id"] in pending and status != last.get(status["task_id"]):
+                last[status["task_id"]] = status
+                changed.append(status)
+                if status["status"] in states.READY_STATES:
+                    pending.discard(status["task_id"])
+        return changed
+
+    # Subscribe before the first read, so a transition in between isn't missed
+    async with job_status_hub.subscribe(*task_ids) as queue:
+        loop = asyncio.get_running_loop()
+        statuses = await get_job_statuses(task_ids)
+        refresh_at = loop.time() + refresh_interval
+
+        while True:
+            changed = changes(statuses)
+            for status in changed:
+                yield f"event: status\ndata: {json.dumps(status, default=str)}\n\n"
+            if not pending:
+                break
+
+            if loop.time() >= refresh_at:
+                if not changed:
+                    # Keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                statuses = await get_job_statuses(sorted(pending))
+                refresh_at = loop.time() + refresh_interval
+                continue
+
+            try:
+                data = await asyncio.wait_for(queue.get(), timeout=refresh_at - loop.time())
+            except asyncio.TimeoutError:
+                statuses = []
+                continue
+
+            meta = None if data == RESYNC_MESSAGE else celery_app.backend.decode_result(data)
+            if meta is not None and meta.get("task_id") in pending:
+                statuses = [job_status(meta["task_id"], meta)]
+            else:
+                statuses = await get_job_statuses(sorted(pending))
+
+    yield "event: done\ndata: {}\n\n"
+
+job_status_hub = PubSubHub(
+    celery_app.backend.task_keyprefix.decode(),
+    queue_size=settings.job_status_max_ids,
+    connect=create_result_pubsub,
+)
@@ -1,20 +1,177 @@
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Annotated, Any, List, Literal, Optional
 
+from sqlalchemy import BigInteger, Column, Computed, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
 from sqlmodel import Field, SQLModel
-from pydantic import BaseModel
+from pydantic import AfterValidator, BaseModel, Field as PydanticField, model_validator
 from uuid import UUID
 
 
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Deadlines are stored as naive UTC timestamps, and asyncpg refuses aware
+    # datetimes for those columns instead of converting them
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+UTCDatetime = Annotated[datetime, AfterValidator(to_naive_utc)]
+
 class TaskCreate(BaseModel):
-    title: str
-    deadline: Optional[datetime] = None
-    description: str
+    title: str = PydanticField(..., max_length=100)
+    deadline: Optional[UTCDatetime] = None
+    description: str = PydanticField(..., max_length=500)
+
+class TaskUpdate(BaseModel):
+    title: Optional[str] = PydanticField(default=None, max_length=100)
+    deadline: Optional[UTCDatetime] = None
+    description: Optional[str] = PydanticField(default=None, max_length=500)
+    completed: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def check_required_not_null(self):
+        # Omitted fields are left alone, but only deadline may be cleared with null
+        for name in ("title", "description", "completed"):
+            if name in self.model_fields_set and getattr(self, name) is None:
+                raise ValueError(f"{name} cannot be null")
+        return self
+
+    def changes(self) -> dict:
+        return self.model_dump(include=self.model_fields_set - {"id"})
+
+class TaskBulkUpdate(TaskUpdate):
+    id: int
 
 class Task(SQLModel, table=True):
+    __table_args__ = (
+        # Keyset pagination: WHERE user_id = ? AND id > ? ORDER BY id
+        Index("ix_task_user_id_id", "user_id", "id"),
+        Index("ix_task_user_id_completed_id", "user_id", "completed", "id"),
+        Index(
+            "ix_task_user_id_deadline",
+            "user_id",
+            "deadline",
+            postgresql_where=text("deadline IS NOT NULL"),
+            sqlite_where=text("deadline IS NOT NULL"),
+        ),
+        # Due soon / overdue: open tasks only, walked in (deadline, id) order
+        Index(
+            "ix_task_user_id_deadline_open",
+            "user_id",
+            "deadline",
+            "id",
+            postgresql_where=text("completed = false"),
+            sqlite_where=text("completed = false"),
+        ),
+        # Deadline reminders: open tasks of all users in (deadline, id) order
+        Index(
+            "ix_task_deadline_open",
+            "deadline",
+            "id",
+            postgresql_where=text("completed = false"),
+            sqlite_where=text("completed = false"),
+        ),
+        # Delta sync: WHERE user_id = ? AND version > ?
+        Index("ix_task_user_id_version", "user_id", "version"),
+        # Full-text search, kept up to date by PostgreSQL itself. Not mapped on
+        # the model, so it is never loaded or returned with a task
+        Column(
+            "search_vector",
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            info={"postgresql_only": True},
+        ),
+        Index("ix_task_search_vector", "search_vector", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
+
     id: int | None = Field(default=None, primary_key=True)
     title: str = Field(..., max_length=100)
     user_id: UUID = Field(foreign_key="user.id")
     deadline: Optional[datetime] = Field(default=None)
     description: str = Field(..., max_length=500)
     completed: bool = Field(default=False)
+    version: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"))
+    updated_at: Optional[datetime] = Field(default=None)
+
+@compiles(CreateColumn, "sqlite")
+def _skip_postgresql_only_columns(element, compiler, **kw):
+    # SQLite has no text search functions to generate these from; search falls
+    # back to LIKE there
+    if element.element.info.get("postgresql_only"):
+        return None
+    return compiler.visit_create_column(element, **kw)
+
+class TaskTombstone(SQLModel, table=True):
+    """
+    Left behind by a delete so that delta-sync clients learn about it.
+    """
+    __tablename__ = "task_tombstone"
+    __table_args__ = (
+        Index("ix_task_tombstone_user_id_version", "user_id", "version"),
+    )
+
+    task_id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    user_id: UUID = Field(foreign_key="user.id")
+    version: int = Field(sa_column=Column(BigInteger, nullable=False))
+    deleted_at: datetime = Field()
+
+class TaskSyncState(SQLModel, table=True):
+    """
+    Per-user change counter. Every write transaction takes the next value, and the
+    row lock it holds until commit keeps versions in commit order for that user.
+    """
+    __tablename__ = "task_sync_state"
+
+    user_id: UUID = Field(foreign_key="user.id", primary_key=True)
+    version: int = Field(sa_column=Column(BigInteger, nullable=False))
+
+class TaskChanges(BaseModel):
+    version: int
+    changed: List[Task]
+    deleted: List[int]
+
+class TaskPage(BaseModel):
+    items: List[Task]
+    next_cursor: Optional[str] = None
+
+class TaskDeadlineSummary(BaseModel):
+    overdue: int
+    due_soon: int
+    window_hours: int
+
+class TaskBulkRequest(BaseModel):
+    # Items are validated one by one so a bad item is reported, not the whole batch
+    create: List[Any] = []
+    update: List[Any] = []
+    delete: List[int] = []
+
+class TaskBulkError(BaseModel):
+    op: Literal["create", "update", "delete"]
+    index: int
+    id: Optional[int] = None
+    detail: str
+
+class TaskBulkResult(BaseModel):
+    created: List[Task] = []
+    updated: List[Task] = []
+    deleted: List[int] = []
+    errors: List[TaskBulkError] = []
+
+class JobStatus(BaseModel):
+    task_id: str
+    status: str
+    result: Any = None
+    info: Any = None
+
+class JobStatusBatchRequest(BaseModel):
+    ids: List[str] = PydanticField(..., min_length=1)
+
+class JobStatusBatch(BaseModel):
+    statuses: List[JobStatus]
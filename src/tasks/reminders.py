@@ -0,0 +1,102 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from sqlalchemy import tuple_
+from sqlmodel import Session, select
+
+from src.auth.models import User
+from src.config import settings
+from src.notifications import NotificationBatcher
+from src.tasks.models import Task
+
+logger = logging.getLogger(__name__)
+
+SENT_KEY_PREFIX = "reminders:sent:"
+
+def due_task_batches(db: Session, start: datetime, end: datetime, batch_size: int) -> Iterator[list]:
+    """
+    Open tasks of active users with start <= deadline < end, in (deadline, id)
+    batches. Each batch is one keyset range scan on the partial
+    (deadline, id) WHERE completed = false index, so the cost follows the
+    number of tasks due rather than the size of the table.
+    """
+    query = (
+        select(Task.id, Task.title, Task.deadline, User.email)
+        .join(User, User.id == Task.user_id)
+        .where(~Task.completed, Task.deadline >= start, Task.deadline < end, User.disabled.isnot(True))
+        .order_by(Task.deadline, Task.id)
+        .limit(batch_size)
+    )
+
+    last = None
+    while True:
+        batch = db.exec(query if last is None else query.where(tuple_(Task.deadline, Task.id) > tuple_(*last))).all()
+        if batch:
+            yield batch
+        if len(batch) < batch_size:
+            return
+        last = (batch[-1].deadline, batch[-1].id)
+
+def _sent_key(deadline: datetime) -> str:
+    return f"{SENT_KEY_PREFIX}{deadline:%Y%m%d}"
+
+def _sent_member(row) -> str:
+    # A changed deadline is a new reminder
+    return f"{row.id}:{row.deadline.isoformat()}"
+
+def claim_reminders(client, rows: list) -> list:
+    """
+    Marks the rows' reminders as sent and returns the rows not sent before, in
+    one round trip. Sets are per deadline day and expire once that day is
+    well past, and being in Redis they survive worker restarts.
+    """
+    with client.pipeline(transaction=False) as pipe:
+        for row in rows:
+            pipe.sadd(_sent_key(row.deadline), _sent_member(row))
+        for key in {_sent_key(row.deadline) for row in rows}:
+            pipe.expire(key, settings.reminder_dedupe_ttl)
+        added = pipe.execute()[:len(rows)]
+    return [row for row, new in zip(rows, added) if new]
+
+def release_reminders(client, rows: list):
+    # For reminders that couldn't be enqueued, so the next run retries them
+    with client.pipeline(transaction=False) as pipe:
+        for row in rows:
+            pipe.srem(_sent_key(row.deadline), _sent_member(row))
+        pipe.execute()
+
+def reminder_message(rows: list) -> str:
+    lines = [f"- {row.title} (due {row.deadline:%Y-%m-%d %H:%M} UTC)" for row in rows]
+    return "\n".join([f"{len(rows)} task(s) due soon:", *lines])
+
+def send_deadline_reminders(
+    db: Session, client, batcher: NotificationBatcher, now: datetime, window: timedelta, batch_size: int
+) -> dict:
+    """
+    Enqueues one reminder per user and batch for open tasks due within
+    `window` of `now`, skipping tasks already reminded about.
+    """
+    totals = {"due": 0, "sent": 0, "users": 0, "deferred": 0}
+
+    for batch in due_task_batches(db, now, now + window, batch_size):
+        totals["due"] += len(batch)
+        rows = claim_reminders(client, batch)
+        if not rows:
+            continue
+
+        by_user = defaultdict(list)
+        for row in rows:
+            by_user[row.email].append(row)
+
+        rejected = set(batcher.enqueue_many((email, reminder_message(user_rows)) for email, user_rows in by_user.items()))
+        deferred = [row for email in rejected for row in by_user[email]]
+        if deferred:
+            release_reminders(client, deferred)
+
+        totals["sent"] += len(rows) - len(deferred)
+        totals["users"] += len(by_user) - len(rejected)
+        totals["deferred"] += len(deferred)
+
+    return totals
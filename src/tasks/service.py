@@ -1,46 +1,560 @@
-from typing import List, Optional
+import base64
+import binascii
+import csv
+import io
+import json
+import os
+import shutil
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Literal, Optional, Tuple
+from uuid import uuid4
 
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import and_, delete, func, insert, literal, or_, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 
 from src.auth.models import User
+from src.config import settings
 from src.database import SessionDep
-from src.tasks.models import Task
+from src.tasks.cache import task_list_cache
+from src.tasks.events import publish_task_event
+from src.tasks.models import (
+    Task,
+    TaskBulkError,
+    TaskBulkRequest,
+    TaskBulkResult,
+    TaskBulkUpdate,
+    TaskChanges,
+    TaskCreate,
+    TaskDeadlineSummary,
+    TaskSyncState,
+    TaskTombstone,
+    TaskUpdate,
+    to_naive_utc,
+)
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, types: tuple) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        values = None
+
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(isinstance(value, kind) and not isinstance(value, bool) for value, kind in zip(values, types))
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+    return values
+
+EXPORT_COLUMNS = ["id", "title", "description", "deadline", "completed"]
+
+async def gzip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _write_upload(source, path: str):
+    with open(path, "wb") as destination:
+        shutil.copyfileobj(source, destination, 1024 * 1024)
+
+def utcnow() -> datetime:
+    # Deadlines are stored as naive UTC timestamps
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}" for err in error.errors()
+    )
+
+def _upsert(dialect: str, model):
+    # ON CONFLICT lives in the dialect-specific insert() constructs
+    return (postgresql.insert if dialect == "postgresql" else sqlite.insert)(model)
+
+def next_sync_version_statement(dialect: str, user_id):
+    """
+    Takes the next change version for a user inside the current transaction.
+
+    The upsert locks the user's sync state row until commit, so concurrent
+    writers for one user are serialized and versions become visible in order.
+    """
+    stmt = _upsert(dialect, TaskSyncState).values(user_id=user_id, version=1)
+    return stmt.on_conflict_do_update(
+        index_elements=[TaskSyncState.user_id],
+        set_={"version": TaskSyncState.version + 1},
+    ).returning(TaskSyncState.version)
+
+def next_sync_versions_statement(dialect: str, user_ids):
+    """
+    next_sync_version_statement for every user id selected by `user_ids` in one
+    statement; returns (user_id, version) rows. Order the select by id so that
+    concurrent batches lock the sync state rows in the same order.
+    """
+    stmt = _upsert(dialect, TaskSyncState).from_select(
+        ["user_id", "version"], user_ids.add_columns(literal(1).label("version"))
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[TaskSyncState.user_id],
+        set_={"version": TaskSyncState.version + 1},
+    ).returning(TaskSyncState.user_id, TaskSyncState.version)
+
+async def _next_sync_version(session: SessionDep, user_id) -> int:
+    return (await session.exec(next_sync_version_statement(session.bind.dialect.name, user_id))).scalar_one()
+
+async def _write_tombstones(session: SessionDep, user_id, task_ids: List[int], version: int):
+    stmt = _upsert(session.bind.dialect.name, TaskTombstone)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TaskTombstone.task_id],
+        set_={"user_id": stmt.excluded.user_id, "version": stmt.excluded.version, "deleted_at": stmt.excluded.deleted_at},
+    )
+    now = utcnow()
+    await session.exec(
+        stmt,
+        params=[{"task_id": task_id, "user_id": user_id, "version": version, "deleted_at": now} for task_id in task_ids],
+    )
 
 class TaskService:
     @staticmethod
-    def create_task(task_data, current_user: User, session: SessionDep) -> Task:
-        task = Task(**task_data.model_dump(), completed=False, user_id=current_user.id)
+    async def create_task(task_data, current_user: User, session: SessionDep) -> Task:
+        version = await _next_sync_version(session, current_user.id)
+        task = Task(
+            **task_data.model_dump(),
+            completed=False,
+            user_id=current_user.id,
+            version=version,
+            updated_at=utcnow(),
+        )
         session.add(task)
-        session.commit()
-        session.refresh(task)
+        await session.commit()
+        await session.refresh(task)
+        await task_list_cache.bump(current_user.id)
+        await publish_task_event(current_user.id, version, changed=[task.id])
         return task
 
     @staticmethod
-    def get_all_tasks(current_user: User, session: SessionDep) -> List[Task]:
-        tasks = session.exec(select(Task).where(Task.user_id == current_user.id)).all()
+    async def get_all_tasks(current_user: User, session: SessionDep) -> List[Task]:
+        tasks = (await session.exec(select(Task).where(Task.user_id == current_user.id))).all()
         return list(tasks)
 
     @staticmethod
-    def update_task(task_id: int, task_data, current_user: User, session: SessionDep) -> Optional[Task]:
-        task = session.exec(select(Task).where(Task.id == task_id, Task.user_id == current_user.id)).first()
+    async def get_all_tasks_json(current_user: User, session: SessionDep) -> str:
+        """
+        Serialized task list, served from the versioned Redis cache when possible.
+        """
+        return await task_list_cache.get_or_load(
+            current_user.id,
+            lambda: TaskService.get_all_tasks(current_user, session),
+        )
 
-        if task:
-            for key, value in task_data.model_dump().items():
-                setattr(task, key, value)
-            session.add(task)
-            session.commit()
-            session.refresh(task)
-            return task
+    @staticmethod
+    async def export_tasks(
+        current_user: User,
+        session: SessionDep,
+        export_format: Literal["ndjson", "csv"] = "ndjson",
+    ) -> AsyncIterator[str]:
+        """
+        Streams the user's tasks from a server-side cursor, one text chunk per
+        fetched batch, so memory use doesn't depend on the number of tasks.
+        """
+        result = await session.stream_scalars(
+            select(Task)
+            .where(Task.user_id == current_user.id)
+            .order_by(Task.id)
+            .execution_options(yield_per=settings.export_batch_size)
+        )
+
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            yield buffer.getvalue()
+
+        async for batch in result.partitions():
+            buffer = io.StringIO()
+            if export_format == "csv":
+                writer = csv.writer(buffer)
+                for task in batch:
+                    writer.writerow([
+                        task.id,
+                        task.title,
+                        task.description,
+                        task.deadline.isoformat() if task.deadline else "",
+                        task.completed,
+                    ])
+            else:
+                for task in batch:
+                    buffer.write(task.model_dump_json(include=set(EXPORT_COLUMNS)))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+
+    @staticmethod
+    async def save_import_upload(upload: UploadFile) -> str:
+        """
+        Copies an uploaded import file to IMPORT_DIR for the import worker and returns its path.
 
-        return None
+        Workers open the file by that path, so IMPORT_DIR has to be a volume shared by
+        the API and the Celery workers. It is not created here: a missing mount fails
+        the upload instead of leaving the file where no worker can read it.
+        """
+        if not os.path.isdir(settings.import_dir):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Task import is unavailable: IMPORT_DIR {settings.import_dir} is not mounted",
+            )
+
+        path = os.path.join(settings.import_dir, f"{uuid4()}.upload")
+        await run_in_threadpool(_write_upload, upload.file, path)
+        return path
+
+    @staticmethod
+    async def discard_import_upload(path: str):
+        # For uploads whose import job could not be queued
+        try:
+            await run_in_threadpool(os.remove, path)
+        except FileNotFoundError:
+            pass
 
     @staticmethod
-    def delete_task(task_id: int, current_user: User, session: SessionDep) -> Optional[Task]:
-        task = session.exec(select(Task).where(Task.id == task_id, Task.user_id == current_user.id)).first()
+    async def list_tasks(
+        current_user: User,
+        session: SessionDep,
+        limit: int = 50,
+        after: Optional[str] = None,
+        completed: Optional[bool] = None,
+        deadline_from: Optional[datetime] = None,
+        deadline_to: Optional[datetime] = None,
+    ) -> Tuple[List[Task], Optional[str]]:
+        """
+        Keyset-paginated listing ordered by id, served by the (user_id, id) index.
+        Returns the page and an opaque cursor for the next one (None on the last page).
+        """
+        query = select(Task).where(Task.user_id == current_user.id)
+
+        if after is not None:
+            (last_id,) = decode_cursor(after, (int,))
+            query = query.where(Task.id > last_id)
+        if completed is not None:
+            query = query.where(Task.completed == completed)
+        if deadline_from is not None:
+            query = query.where(Task.deadline >= to_naive_utc(deadline_from))
+        if deadline_to is not None:
+            query = query.where(Task.deadline < to_naive_utc(deadline_to))
+
+        # Fetch one extra row to find out whether another page exists
+        tasks = list((await session.exec(query.order_by(Task.id).limit(limit + 1))).all())
+
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            return tasks, encode_cursor([tasks[-1].id])
+
+        return tasks, None
+
+    @staticmethod
+    async def get_changes(current_user: User, session: SessionDep, since: int = 0) -> TaskChanges:
+        """
+        Tasks changed and ids deleted after version `since`, plus the version to
+        pass as `since` next time. `since=0` is a full sync and returns no deletions.
+        """
+        # Read the high-water mark first: anything committed later gets a higher
+        # version and is picked up by the next call instead of being skipped
+        version = (await session.exec(
+            select(TaskSyncState.version).where(TaskSyncState.user_id == current_user.id)
+        )).first() or 0
+
+        query = select(Task).where(Task.user_id == current_user.id, Task.version <= version)
+        if since:
+            query = query.where(Task.version > since)
+        changed = list((await session.exec(query.order_by(Task.version, Task.id))).all())
+
+        deleted = []
+        if since:
+            deleted = list((await session.exec(
+                select(TaskTombstone.task_id)
+                .where(
+                    TaskTombstone.user_id == current_user.id,
+                    TaskTombstone.version > since,
+                    TaskTombstone.version <= version,
+                )
+                .order_by(TaskTombstone.version, TaskTombstone.task_id)
+            )).all())
+
+        return TaskChanges(version=version, changed=changed, deleted=deleted)
+
+    @staticmethod
+    async def _update_fields(task_id: int, changes: dict, current_user: User, session: SessionDep) -> Optional[Task]:
+        # One ownership-scoped UPDATE ... RETURNING instead of SELECT, UPDATE and refresh
+        version = await _next_sync_version(session, current_user.id)
+        result = await session.exec(
+            update(Task)
+            .where(Task.id == task_id, Task.user_id == current_user.id)
+            .values(**changes, version=version, updated_at=utcnow())
+            .returning(Task)
+            .execution_options(populate_existing=True)
+        )
+        task = result.scalars().first()
+        await session.commit()
 
         if task:
-            session.delete(task)
-            session.commit()
-            return task
+            await task_list_cache.bump(current_user.id)
+            await publish_task_event(current_user.id, version, changed=[task.id])
+
+        return task
+
+    @staticmethod
+    async def search_tasks(
+        current_user: User,
+        session: SessionDep,
+        q: str,
+        limit: int = 20,
+        after: Optional[str] = None,
+    ) -> Tuple[List[Task], Optional[str]]:
+        """
+        Full-text search over title and description, best matches first.
+
+        On PostgreSQL this matches the generated `search_vector` column through its
+        GIN index and ranks with ts_rank_cd; other backends fall back to a
+        case-insensitive substring match with a constant rank. Pages are keyed by
+        (rank, id), so the cursor stays stable while paging.
+        """
+        if session.bind.dialect.name == "postgresql":
+            vector = Task.__table__.c.search_vector
+            ts_query = func.websearch_to_tsquery("english", q)
+            rank = func.ts_rank_cd(vector, ts_query)
+            match = vector.op("@@")(ts_query)
+        else:
+            # The query is matched literally, so its own % and _ must not act as wildcards
+            escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%"
+            rank = literal(0.0)
+            match = or_(Task.title.ilike(pattern, escape="\\"), Task.description.ilike(pattern, escape="\\"))
+
+        query = select(Task, rank.label("rank")).where(Task.user_id == current_user.id, match)
+
+        if after is not None:
+            last_rank, last_id = decode_cursor(after, (float, int))
+            query = query.where(or_(rank < last_rank, and_(rank == last_rank, Task.id > last_id)))
+
+        rows = list((await session.exec(query.order_by(rank.desc(), Task.id).limit(limit + 1))).all())
+
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_task, last_rank = rows[-1]
+            return [task for task, _ in rows], encode_cursor([float(last_rank), last_task.id])
+
+        return [task for task, _ in rows], None
+
+    @staticmethod
+    async def list_open_by_deadline(
+        current_user: User,
+        session: SessionDep,
+        deadline_from: Optional[datetime] = None,
+        deadline_to: Optional[datetime] = None,
+        limit: int = 50,
+        after: Optional[str] = None,
+    ) -> Tuple[List[Task], Optional[str]]:
+        """
+        Open tasks with a deadline in [deadline_from, deadline_to), earliest first.
+        A range scan on the partial (user_id, deadline, id) WHERE completed = false index.
+        """
+        query = select(Task).where(Task.user_id == current_user.id, ~Task.completed, Task.deadline.is_not(None))
+
+        if deadline_from is not None:
+            query = query.where(Task.deadline >= to_naive_utc(deadline_from))
+        if deadline_to is not None:
+            query = query.where(Task.deadline < to_naive_utc(deadline_to))
+        if after is not None:
+            last_deadline, last_id = decode_cursor(after, (str, int))
+            try:
+                last_deadline = to_naive_utc(datetime.fromisoformat(last_deadline))
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+            query = query.where(tuple_(Task.deadline, Task.id) > tuple_(last_deadline, last_id))
+
+        tasks = list((await session.exec(query.order_by(Task.deadline, Task.id).limit(limit + 1))).all())
+
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            return tasks, encode_cursor([tasks[-1].deadline.isoformat(), tasks[-1].id])
+
+        return tasks, None
+
+    @staticmethod
+    async def get_deadline_summary(current_user: User, session: SessionDep, window_hours: int = 24) -> TaskDeadlineSummary:
+        """
+        Overdue and due-within-window counts in one aggregate over the same partial index.
+        """
+        now = utcnow()
+        query = select(
+            func.count().filter(Task.deadline < now),
+            func.count().filter(Task.deadline >= now),
+        ).where(
+            Task.user_id == current_user.id,
+            ~Task.completed,
+            Task.deadline < now + timedelta(hours=window_hours),
+        )
+
+        overdue, due_soon = (await session.exec(query)).one()
+        return TaskDeadlineSummary(overdue=overdue, due_soon=due_soon, window_hours=window_hours)
+
+    @staticmethod
+    async def update_task(task_id: int, task_data, current_user: User, session: SessionDep) -> Optional[Task]:
+        return await TaskService._update_fields(task_id, task_data.model_dump(), current_user, session)
+
+    @staticmethod
+    async def patch_task(task_id: int, task_data: TaskUpdate, current_user: User, session: SessionDep) -> Optional[Task]:
+        changes = task_data.changes()
+
+        if not changes:
+            return (await session.exec(select(Task).where(Task.id == task_id, Task.user_id == current_user.id))).first()
+
+        return await TaskService._update_fields(task_id, changes, current_user, session)
+
+    @staticmethod
+    async def delete_task(task_id: int, current_user: User, session: SessionDep) -> Optional[Task]:
+        # Take the version (and its sync state row lock) before touching the task,
+        # in the same order as the other write paths, so they can't deadlock
+        version = await _next_sync_version(session, current_user.id)
+        result = await session.exec(
+            delete(Task).where(Task.id == task_id, Task.user_id == current_user.id).returning(Task)
+        )
+        task = result.scalars().first()
+        if not task:
+            # A skipped version is harmless, like a patch of a missing task; a
+            # rollback would expire current_user along with everything else
+            await session.commit()
+            return None
+
+        await _write_tombstones(session, current_user.id, [task.id], version)
+        await session.commit()
+
+        await task_list_cache.bump(current_user.id)
+        await publish_task_event(current_user.id, version, deleted=[task.id])
+
+        return task
+
+    @staticmethod
+    async def bulk_apply(request: TaskBulkRequest, current_user: User, session: SessionDep) -> TaskBulkResult:
+        """
+        Applies a batch of creates, updates and deletes in a single transaction.
+
+        Invalid or unknown items are reported in `errors` and skipped, everything
+        else is written with one multi-row INSERT ... RETURNING, one batched
+        UPDATE by primary key and one DELETE ... RETURNING.
+        """
+        total = len(request.create) + len(request.update) + len(request.delete)
+        if total > settings.bulk_max_items:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"A batch may contain at most {settings.bulk_max_items} items",
+            )
+
+        result = TaskBulkResult()
+
+        creates = []
+        for index, raw in enumerate(request.create):
+            try:
+                creates.append(TaskCreate.model_validate(raw))
+            except ValidationError as e:
+                result.errors.append(TaskBulkError(op="create", index=index, detail=_validation_detail(e)))
+
+        updates = {}
+        for index, raw in enumerate(request.update):
+            raw_id = raw.get("id") if isinstance(raw, dict) else None
+            raw_id = raw_id if isinstance(raw_id, int) else None
+            try:
+                item = TaskBulkUpdate.model_validate(raw)
+            except ValidationError as e:
+                result.errors.append(TaskBulkError(op="update", index=index, id=raw_id, detail=_validation_detail(e)))
+                continue
+            if item.id in updates:
+                result.errors.append(TaskBulkError(op="update", index=index, id=item.id, detail="Duplicate id in batch"))
+                continue
+            updates[item.id] = (index, item.changes())
+
+        try:
+            # The whole batch shares one change version
+            version = None
+            if creates or updates or request.delete:
+                version = await _next_sync_version(session, current_user.id)
+            stamp = {"version": version, "updated_at": utcnow()}
+
+            if creates:
+                rows = [{**item.model_dump(), "completed": False, "user_id": current_user.id, **stamp} for item in creates]
+                created = await session.exec(insert(Task).returning(Task, sort_by_parameter_order=True), params=rows)
+                result.created = list(created.scalars().all())
+
+            if updates:
+                # Lock the caller's rows first, so ownership can't change before the UPDATE
+                owned = set((await session.exec(
+                    select(Task.id).where(Task.user_id == current_user.id, Task.id.in_(updates)).with_for_update()
+                )).all())
+
+                for task_id, (index, _) in updates.items():
+                    if task_id not in owned:
+                        result.errors.append(TaskBulkError(op="update", index=index, id=task_id, detail="Task not found"))
+
+                params = [
+                    {"id": task_id, **changes, **stamp}
+                    for task_id, (_, changes) in updates.items()
+                    if task_id in owned and changes
+                ]
+                if params:
+                    await session.exec(update(Task), params=params)
+
+                if owned:
+                    updated = await session.exec(
+                        select(Task).where(Task.id.in_(owned)).order_by(Task.id).execution_options(populate_existing=True)
+                    )
+                    result.updated = list(updated.all())
+
+            if request.delete:
+                deleted = set((await session.exec(
+                    delete(Task).where(Task.user_id == current_user.id, Task.id.in_(request.delete)).returning(Task.id)
+                )).scalars().all())
+
+                seen = set()
+                for index, task_id in enumerate(request.delete):
+                    if task_id in deleted and task_id not in seen:
+                        result.deleted.append(task_id)
+                    else:
+                        result.errors.append(TaskBulkError(op="delete", index=index, id=task_id, detail="Task not found"))
+                    seen.add(task_id)
+
+                if deleted:
+                    await _write_tombstones(session, current_user.id, sorted(deleted), version)
+
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Bulk operation failed, no changes were applied",
+            )
+
+        if result.created or result.updated or result.deleted:
+            await task_list_cache.bump(current_user.id)
+            await publish_task_event(
+                current_user.id,
+                version,
+                changed=[task.id for task in result.created + result.updated],
+                deleted=result.deleted,
+            )
 
-        return None
+        return result
@@ -1,10 +1,26 @@
+from celery import chord, group
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from src.auth.models import User
 from src.celery import celery_app
-from src.database import get_session
+from src.config import settings
+from src.database import get_sync_engine, session_scope
+from src.notifications import notification_batcher
+from src.redis import redis_client
+from src.tasks import reminders
+from src.tasks.cache import task_list_cache
+from src.tasks.events import publish_task_event_sync, publish_task_events_sync
+from src.tasks.importer import import_tasks_file
 from src.tasks.models import Task
+from src.tasks.service import next_sync_version_statement, next_sync_versions_statement, utcnow
+import os
 import random
+import time
 import logging
-from uuid import uuid4
-from datetime import datetime
+from typing import List, Optional, Tuple
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger(__name__)
 
@@ -39,92 +55,233 @@ RANDOM_DESCRIPTIONS = [
     "Integration task with external services"
 ]
 
-@celery_app.task()
-def create_random_task(user):
+@celery_app.task(bind=True)
+def create_random_task(self, user_id: str):
     """
-    Celery task to create a random task for the current user.
+    Celery task to create a random task for the given user.
     """
-    db = get_session()
+    self.update_state(state="PROGRESS", meta={"step": "creating"})
+
     try:
-        # Randomly select a title and description
-        title = random.choice(RANDOM_TITLES)
-        description = random.choice(RANDOM_DESCRIPTIONS)
-
-        # Create a new task instance
-        new_task = Task(
-            id=uuid4(),
-            user_id=user.id,
-            title=title,
-            description=description,
-            completed=False,
-        )
+        with session_scope() as db:
+            # Randomly select a title and description
+            title = random.choice(RANDOM_TITLES)
+            description = random.choice(RANDOM_DESCRIPTIONS)
 
-        # Add the task to the session and commit
-        db.add(new_task)
-        db.commit()
-        db.refresh(new_task)
-        db.close()
+            version = db.exec(next_sync_version_statement(db.get_bind().dialect.name, UUID(user_id))).scalar_one()
 
-        logger.info(f"Random task created: {new_task.title}")
+            # Create a new task instance
+            new_task = Task(
+                user_id=UUID(user_id),
+                title=title,
+                description=description,
+                completed=False,
+                version=version,
+                updated_at=utcnow(),
+            )
 
-        return {
-            "status": "success",
-            "task_id": new_task.id,
-        }
+            # Add the task to the session, flush to get its id; the scope commits
+            db.add(new_task)
+            db.flush()
     except Exception as e:
         logger.error(f"Failed to add random task: {e}")
-        if 'db' in locals():
-            db.rollback()
-            db.close()
         raise e
 
+    task_list_cache.bump_sync(user_id)
+    publish_task_event_sync(user_id, version, changed=[new_task.id])
+
+    logger.info(f"Random task created: {new_task.title}")
+
+    return {
+        "status": "success",
+        "task_id": new_task.id,
+    }
+
+
+def user_id_ranges(db: Session, chunk_size: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Splits the user table into (after, upto] id ranges of `chunk_size` users.
+
+    Each step is one keyset probe on the primary key index, so the walk never
+    loads user rows and its cost doesn't grow with the position in the table.
+    """
+    ranges = []
+    after = None
+    while True:
+        query = select(User.id).order_by(User.id).offset(chunk_size - 1).limit(1)
+        if after is not None:
+            query = query.where(User.id > after)
+        upto = db.exec(query).first()
+
+        ranges.append((str(after) if after else None, str(upto) if upto else None))
+        if upto is None:
+            return ranges
+        after = upto
 
 @celery_app.task
-def periodic_add_random_task():
+def seed_random_tasks_chunk(after: Optional[str], upto: Optional[str]):
     """
-    Periodic Celery task specifically designed for scheduled execution
-    Adds a random task to the database every minute
+    Adds one random task for every active user with after < id <= upto.
     """
+    users = select(User.id).where(User.disabled.isnot(True)).order_by(User.id)
+    if after is not None:
+        users = users.where(User.id > UUID(after))
+    if upto is not None:
+        users = users.where(User.id <= UUID(upto))
+
     try:
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        logger.info(f"Periodic task started at {current_time}")
+        with session_scope() as db:
+            versions = dict(db.exec(next_sync_versions_statement(db.get_bind().dialect.name, users)).all())
+            if not versions:
+                return {"users": 0, "created": 0}
 
-        # Create a database session
-        db = get_session()
+            now = utcnow()
+            rows = [
+                {
+                    "user_id": user_id,
+                    "title": f"[AUTO] {random.choice(RANDOM_TITLES)}",
+                    "description": f"{random.choice(RANDOM_DESCRIPTIONS)} - Auto-generated at {now:%Y-%m-%d %H:%M:%S}",
+                    "completed": False,
+                    "version": version,
+                    "updated_at": now,
+                }
+                for user_id, version in versions.items()
+            ]
+            created = db.exec(insert(Task).returning(Task.id, Task.user_id), params=rows).all()
+    except Exception as e:
+        logger.error(f"Random task seeding failed for users ({after}, {upto}]: {e}")
+        raise e
+
+    task_list_cache.bump_many_sync(versions)
+    publish_task_events_sync((user_id, versions[user_id], [task_id]) for task_id, user_id in created)
 
-        # Generate random task data with timestamp
-        random_title = random.choice(RANDOM_TITLES)
-        random_description = f"{random.choice(RANDOM_DESCRIPTIONS)} - Auto-generated at {current_time}"
+    return {"users": len(versions), "created": len(created)}
 
-        # Create a new task instance
-        new_task = Task(
-            title=f"[AUTO] {random_title}",
-            description=random_description,
-            completed=False
+@celery_app.task
+def summarize_random_task_seeding(results: List[dict], started_at: str):
+    """
+    Chord callback: totals the per-chunk results of one seeding run.
+    """
+    summary = {
+        "status": "success",
+        "chunks": len(results),
+        "users": sum(result["users"] for result in results),
+        "created": sum(result["created"] for result in results),
+        "started_at": started_at,
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+    }
+    logger.info(f"Random task seeding finished: {summary}")
+    return summary
+
+@celery_app.task
+def send_deadline_reminders():
+    """
+    Periodic Celery task that reminds users of open tasks due within the next
+    `reminder_window` seconds. Runs overlap, and reminders already sent are
+    skipped through the dedupe sets in Redis.
+    """
+    with session_scope() as db:
+        totals = reminders.send_deadline_reminders(
+            db,
+            redis_client,
+            notification_batcher,
+            now=utcnow(),
+            window=timedelta(seconds=settings.reminder_window),
+            batch_size=settings.reminder_batch_size,
         )
 
-        # Add to database
-        db.add(new_task)
-        db.commit()
-        db.refresh(new_task)
+    logger.info(f"Deadline reminders: {totals}")
+    return totals
 
-        logger.info(f"Periodic task successfully added: {new_task.title} (ID: {new_task.id}) at {current_time}")
+@celery_app.task
+def periodic_add_random_task():
+    """
+    Periodic Celery task that adds a random task for every active user.
+
+    The user table is split into id ranges here, and a chord of per-range
+    workers does the inserts in parallel across all worker processes, with
+    summarize_random_task_seeding collecting the totals.
+    """
+    started_at = datetime.now(timezone.utc).isoformat()
+    with session_scope() as db:
+        ranges = user_id_ranges(db, settings.seed_chunk_size)
+
+    result = chord(
+        group(seed_random_tasks_chunk.s(after, upto) for after, upto in ranges),
+        summarize_random_task_seeding.s(started_at=started_at),
+    ).apply_async()
+
+    logger.info(f"Random task seeding started with {len(ranges)} chunks")
 
-        # Close the session
-        db.close()
+    return {
+        "status": "started",
+        "chunks": len(ranges),
+        "chord_id": result.id,
+        "started_at": started_at,
+    }
+
+
+@celery_app.task(bind=True)
+def import_tasks(self, path: str, file_format: str, user_id: str):
+    """
+    Celery task that bulk-loads an uploaded CSV/NDJSON file for one user with COPY.
+    Reports PROGRESS with processed/rejected counts after every chunk.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Import file {path} not found: IMPORT_DIR must be a volume shared by the API and the workers"
+        )
+
+    connection = get_sync_engine().raw_connection()
+    try:
+        result = import_tasks_file(
+            connection,
+            path,
+            file_format,
+            UUID(user_id),
+            chunk_size=settings.import_chunk_size,
+            on_progress=lambda progress: self.update_state(state="PROGRESS", meta=progress),
+        )
+        task_list_cache.bump_sync(user_id)
+        publish_task_event_sync(user_id, result["version"])
+
+        logger.info(f"Imported {result['imported']} tasks for user {user_id}, rejected {result['rejected']}")
 
         return {
             "status": "success",
-            "task_id": new_task.id,
-            "title": new_task.title,
-            "description": new_task.description,
-            "execution_time": current_time,
-            "message": f"Periodic random task '{new_task.title}' added successfully at {current_time}"
+            **result,
         }
-
     except Exception as e:
-        logger.error(f"Periodic task failed at {datetime.now()}: {e}")
-        if 'db' in locals():
-            db.rollback()
-            db.close()
-        raise e
\ No newline at end of file
+        logger.error(f"Task import failed for user {user_id}: {e}")
+        connection.rollback()
+        raise e
+    finally:
+        connection.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+@celery_app.task
+def cleanup_import_uploads():
+    """
+    Periodic Celery task that removes uploads whose import job never ran.
+    Jobs expire after the same IMPORT_UPLOAD_TTL, so none is left waiting for a removed file.
+    """
+    if not os.path.isdir(settings.import_dir):
+        # Workers without the upload volume have nothing to clean up
+        logger.info(f"Import upload directory {settings.import_dir} is not mounted here, skipping cleanup")
+        return {"removed": 0}
+
+    cutoff = time.time() - settings.import_upload_ttl
+    removed = 0
+    for entry in os.scandir(settings.import_dir):
+        if entry.name.endswith(".upload") and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                # Picked up by its job in the meantime
+                pass
+
+    logger.info(f"Removed {removed} stale import uploads")
+    return {"removed": removed}
@@ -1,7 +1,12 @@
+import asyncio
+import time
+
 import pytest
-from fastapi.testclient import TestClient
-from fastapi import FastAPI
-from sqlmodel import Session, create_engine, SQLModel
+from httpx import ASGITransport, AsyncClient
+from fastapi import FastAPI, HTTPException
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.pool import StaticPool
 from datetime import timedelta
 
@@ -11,38 +16,71 @@ from src.auth.service import (
     get_password_hash,
     create_access_token,
     authenticate_user,
-    create_user
+    authenticate_token,
+    create_user,
+    disable_user,
+    get_current_user,
 )
+from src.auth.cache import PrincipalCache
+from src.auth.hashing import PasswordHasher
 from src.auth.models import UserDTO
 from src.database import get_session
 
 
 # Test database setup
 @pytest.fixture(name="session")
-def session_fixture():
-    engine = create_engine(
-        "sqlite:///:memory:",
+async def session_fixture():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool
     )
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
+    await engine.dispose()
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
+async def client_fixture(session: AsyncSession):
     def get_session_override():
         return session
 
     app = FastAPI()
     app.include_router(auth_router)
     app.dependency_overrides[get_session] = get_session_override
-    client = TestClient(app)
-    yield client
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(name="redis_store")
+def redis_store_fixture(monkeypatch):
+    store = {}
+
+    async def fake_get_value(key):
+        return store.get(key)
+
+    async def fake_set_value(key, value, expire=None):
+        store[key] = value
+
+    async def fake_delete_key(key):
+        return int(store.pop(key, None) is not None)
+
+    monkeypatch.setattr("src.auth.cache.get_value", fake_get_value)
+    monkeypatch.setattr("src.auth.cache.set_value", fake_set_value)
+    monkeypatch.setattr("src.auth.cache.delete_key", fake_delete_key)
+    return store
+
+
+@pytest.fixture(name="principal_cache")
+def principal_cache_fixture(monkeypatch, redis_store):
+    cache = PrincipalCache(local_ttl=60, local_max_size=100, redis_ttl=300)
+    monkeypatch.setattr("src.auth.service.principal_cache", cache)
+    return cache
+
+
 class TestAuthService:
     def test_verify_password(self):
         password = "testpassword123"
@@ -69,98 +107,195 @@ class TestAuthService:
         assert isinstance(token, str)
         assert len(token) > 0
 
-    def test_create_user(self, session: Session):
+    async def test_create_user(self, session: AsyncSession):
         user_dto = UserDTO(
             username="testuser",
             email="test@example.com",
             password="testpassword123",
             full_name="Test User"
         )
-        user = create_user(user_dto, session)
+        user = await create_user(user_dto, session)
         assert user.username == "testuser"
         assert user.email == "test@example.com"
         assert user.full_name == "Test User"
         assert user.disabled is False
 
-    def test_authenticate_user_success(self, session: Session):
+    async def test_authenticate_user_success(self, session: AsyncSession):
         user_dto = UserDTO(
             username="testuser",
             email="test@example.com",
             password="testpassword123"
         )
-        create_user(user_dto, session)
+        await create_user(user_dto, session)
 
-        authenticated_user = authenticate_user("testuser", "testpassword123", session)
+        authenticated_user = await authenticate_user("testuser", "testpassword123", session)
         assert authenticated_user is not False
         assert authenticated_user.username == "testuser"
 
-    def test_authenticate_user_wrong_password(self, session: Session):
+    async def test_authenticate_user_wrong_password(self, session: AsyncSession):
         user_dto = UserDTO(
             username="testuser",
             email="test@example.com",
             password="testpassword123"
         )
-        create_user(user_dto, session)
+        await create_user(user_dto, session)
 
-        authenticated_user = authenticate_user("testuser", "wrongpassword", session)
+        authenticated_user = await authenticate_user("testuser", "wrongpassword", session)
         assert authenticated_user is False
 
-    def test_authenticate_user_nonexistent(self, session: Session):
-        authenticated_user = authenticate_user("nonexistent", "password", session)
+    async def test_authenticate_user_nonexistent(self, session: AsyncSession):
+        authenticated_user = await authenticate_user("nonexistent", "password", session)
         assert authenticated_user is False
 
 
+class TestPasswordHasher:
+    async def test_hash_and_verify(self):
+        hasher = PasswordHasher(max_workers=2, queue_timeout=5)
+        hashed = await hasher.hash("testpassword123")
+
+        assert await hasher.verify("testpassword123", hashed) is True
+        assert await hasher.verify("wrongpassword", hashed) is False
+        assert verify_password("testpassword123", hashed) is True
+        assert hasher.stats()["completed"] == 3
+        hasher.shutdown()
+
+    async def test_rejects_when_queue_timeout_expires(self):
+        hasher = PasswordHasher(max_workers=1, queue_timeout=0.05)
+        busy = asyncio.create_task(hasher._run(time.sleep, 0.5))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await hasher.hash("testpassword123")
+
+        assert exc_info.value.status_code == 503
+        await busy
+        stats = hasher.stats()
+        assert stats["rejected"] == 1
+        assert stats["queue_depth"] == 0
+        assert stats["in_flight"] == 0
+        hasher.shutdown()
+
+
+class TestPrincipalCache:
+    async def test_local_and_redis_tiers(self, session: AsyncSession, redis_store):
+        user = await create_user(
+            UserDTO(username="testuser", email="test@example.com", password="testpassword123"), session
+        )
+        worker_a = PrincipalCache(local_ttl=60, local_max_size=100, redis_ttl=300)
+        worker_b = PrincipalCache(local_ttl=60, local_max_size=100, redis_ttl=300)
+
+        assert await worker_a.get("testuser") is None
+        await worker_a.set(user)
+
+        cached = await worker_a.get("testuser")
+        assert cached.id == user.id
+        assert cached.hashed_password == ""
+        assert "hashed_password" not in redis_store["auth:principal:testuser"]
+
+        assert (await worker_b.get("testuser")).id == user.id
+        assert worker_a.stats()["local_hits"] == 1
+        assert worker_b.stats()["redis_hits"] == 1
+
+    async def test_local_tier_evicts_least_recently_used(self, session: AsyncSession, redis_store):
+        cache = PrincipalCache(local_ttl=60, local_max_size=1, redis_ttl=300)
+        for name in ("first", "second"):
+            user = await create_user(
+                UserDTO(username=name, email=f"{name}@example.com", password="testpassword123"), session
+            )
+            await cache.set(user)
+
+        assert cache.stats()["local_size"] == 1
+        assert (await cache.get("first")).username == "first"
+        assert cache.stats()["redis_hits"] == 1
+
+    async def test_get_current_user_skips_database_on_hit(self, session: AsyncSession, principal_cache):
+        user = await create_user(
+            UserDTO(username="testuser", email="test@example.com", password="testpassword123"), session
+        )
+        token = create_access_token({"sub": "testuser"})
+
+        assert (await get_current_user(token, session)).id == user.id
+
+        await session.delete(user)
+        await session.commit()
+        assert (await get_current_user(token, session)).id == user.id
+
+    async def test_disable_user_invalidates_cache(self, session: AsyncSession, principal_cache, redis_store):
+        user = await create_user(
+            UserDTO(username="testuser", email="test@example.com", password="testpassword123"), session
+        )
+        token = create_access_token({"sub": "testuser"})
+        await get_current_user(token, session)
+        assert "auth:principal:testuser" in redis_store
+
+        await disable_user(user, session)
+
+        assert "auth:principal:testuser" not in redis_store
+        assert (await get_current_user(token, session)).disabled is True
+
+    async def test_authenticate_token(self, session: AsyncSession, principal_cache):
+        user = await create_user(
+            UserDTO(username="testuser", email="test@example.com", password="testpassword123"), session
+        )
+
+        assert (await authenticate_token(create_access_token({"sub": "testuser"}), session)).id == user.id
+
+        with pytest.raises(HTTPException) as exc:
+            await authenticate_token("not-a-token", session)
+        assert exc.value.status_code == 401
+
+
 class TestAuthController:
-    def test_register_user(self, client: TestClient):
+    async def test_register_user(self, client: AsyncClient):
         user_data = {
             "username": "testuser",
             "email": "test@example.com",
             "password": "testpassword123",
             "full_name": "Test User"
         }
-        response = client.post("/auth/register", json=user_data)
+        response = await client.post("/auth/register", json=user_data)
         assert response.status_code == 200
         data = response.json()
         assert data["username"] == "testuser"
         assert data["email"] == "test@example.com"
         assert data["full_name"] == "Test User"
 
-    def test_register_duplicate_user(self, client: TestClient):
+    async def test_register_duplicate_user(self, client: AsyncClient):
         user_data = {
             "username": "testuser",
             "email": "test@example.com",
             "password": "testpassword123"
         }
         # First registration
-        client.post("/auth/register", json=user_data)
+        await client.post("/auth/register", json=user_data)
         # Second registration should fail
-        response = client.post("/auth/register", json=user_data)
+        response = await client.post("/auth/register", json=user_data)
         assert response.status_code == 400
 
-    def test_login_success(self, client: TestClient):
+    async def test_login_success(self, client: AsyncClient):
         # Register user first
         user_data = {
             "username": "testuser",
             "email": "test@example.com",
             "password": "testpassword123"
         }
-        client.post("/auth/register", json=user_data)
+        await client.post("/auth/register", json=user_data)
 
         # Login
         login_data = {
             "username": "testuser",
             "password": "testpassword123"
         }
-        response = client.post("/auth/token", json=login_data)
+        response = await client.post("/auth/token", json=login_data)
         assert response.status_code == 200
         data = response.json()
         assert "access_token" in data
         assert data["token_type"] == "bearer"
 
-    def test_login_wrong_credentials(self, client: TestClient):
+    async def test_login_wrong_credentials(self, client: AsyncClient):
         login_data = {
             "username": "nonexistent",
             "password": "wrongpassword"
         }
-        response = client.post("/auth/token", json=login_data)
+        response = await client.post("/auth/token", json=login_data)
         assert response.status_code == 401
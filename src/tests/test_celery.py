@@ -0,0 +1,85 @@
+import os
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from kombu.serialization import dumps as kombu_dumps, loads as kombu_loads
+
+from src.celery import BULK_QUEUE, REALTIME_QUEUE, celery_app
+from src.celery_tasks import flush_notifications, send_notification
+from src.serialization import CONTENT_TYPE, SERIALIZER, dumps, loads
+from src.worker import WORKER_PROFILES, main, worker_argv
+
+
+class TestTaskRouting:
+    @pytest.mark.parametrize("task_name, queue, priority", [
+        ("src.celery_tasks.send_notification", REALTIME_QUEUE, 0),
+        ("src.celery_tasks.flush_notifications", REALTIME_QUEUE, 0),
+        ("src.celery_tasks.process_data", BULK_QUEUE, 6),
+        ("src.tasks.tasks.import_tasks", BULK_QUEUE, 3),
+    ])
+    def test_routes(self, task_name, queue, priority):
+        route = celery_app.amqp.router.route({}, task_name)
+        assert route["queue"].name == queue
+        assert route["priority"] == priority
+
+    def test_unrouted_tasks_use_default_queue(self):
+        route = celery_app.amqp.router.route({}, "src.celery_tasks.cleanup_old_data")
+        assert route["queue"].name == celery_app.conf.task_default_queue
+
+
+class TestWorkerCli:
+    def test_worker_argv(self):
+        profile = WORKER_PROFILES[REALTIME_QUEUE]
+        argv = worker_argv(REALTIME_QUEUE, extra=["--pool", "threads"])
+
+        assert argv[:3] == ["worker", "--queues", REALTIME_QUEUE]
+        assert argv[argv.index("--concurrency") + 1] == str(profile.concurrency)
+        assert argv[argv.index("--prefetch-multiplier") + 1] == str(profile.prefetch_multiplier)
+        assert argv[-2:] == ["--pool", "threads"]
+
+    def test_print(self, capsys):
+        main([BULK_QUEUE, "--print"])
+        assert capsys.readouterr().out.startswith("celery -A src.celery:celery_app worker --queues bulk")
+
+
+class TestSerializer:
+    def test_round_trip(self):
+        payload = {
+            "id": uuid4(),
+            "at": datetime(2025, 6, 1, 12, 30, tzinfo=timezone.utc),
+            "amount": Decimal("1.10"),
+            "items": [1, "two", None, b"\x00"],
+            1: "int key",
+        }
+        assert loads(dumps(payload)) == payload
+
+    def test_compresses_above_threshold(self):
+        small = {"message": "hi"}
+        large = {"rows": ["same row"] * 500}
+
+        assert dumps(small, threshold=1024)[:1] == b"\x00"
+        encoded = dumps(large, threshold=1024)
+        assert encoded[:1] == b"\x01"
+        assert len(encoded) < len(dumps(large, threshold=10 ** 9))
+        assert loads(encoded) == large
+
+    def test_incompressible_payload_stays_plain(self):
+        payload = {"blob": os.urandom(512)}
+        assert dumps(payload, threshold=0)[:1] == b"\x00"
+
+    def test_registered_with_kombu(self):
+        content_type, encoding, body = kombu_dumps({"a": 1}, serializer=SERIALIZER)
+        assert kombu_loads(body, content_type, encoding, accept=[CONTENT_TYPE]) == {"a": 1}
+
+    def test_result_backend_uses_serializer(self):
+        meta = {"status": "SUCCESS", "result": {"rows": list(range(1000))}, "task_id": "job"}
+        encoded = celery_app.backend.encode(meta)
+
+        assert encoded[:1] == b"\x01"
+        assert celery_app.backend.decode_result(encoded)["result"] == meta["result"]
+
+    def test_fire_and_forget_tasks_ignore_results(self):
+        assert send_notification.ignore_result
+        assert flush_notifications.ignore_result
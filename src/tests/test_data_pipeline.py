@@ -0,0 +1,178 @@
+import json
+
+import pytest
+from redis import ResponseError
+
+from src import data_pipeline
+from src.data_pipeline import (
+    CONSUMER_GROUP,
+    INPUT_STREAM,
+    RESULT_STREAM,
+    append_records,
+    claim_consumer_slot,
+    ensure_group,
+    process_batch,
+    release_consumer_slot,
+)
+
+
+class FakeStreams:
+    """
+    One consumer group per stream, with a pending list of (entry id, consumer,
+    delivery time); time only moves when a test advances `now`. Plus the SET NX
+    and DEL of the consumer slot.
+    """
+
+    def __init__(self):
+        self.streams = {}
+        self.groups = {}
+        self.maxlen = {}
+        self.strings = {}
+        self.now = 0
+        self.sequence = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def xadd(self, stream, fields, maxlen=None, approximate=True):
+        self.sequence += 1
+        self.maxlen[stream] = maxlen
+        entry_id = f"{self.sequence}-0"
+        self.streams.setdefault(stream, []).append((entry_id, dict(fields)))
+        return entry_id
+
+    def xgroup_create(self, stream, group, id="$", mkstream=False):
+        if stream in self.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        self.streams.setdefault(stream, [])
+        self.groups[stream] = {"delivered": 0, "pending": {}}
+
+    def xreadgroup(self, group, consumer, streams, count=None):
+        (stream, _), = streams.items()
+        state = self.groups[stream]
+        entries = [entry for entry in self.streams[stream] if int(entry[0].split("-")[0]) > state["delivered"]][:count]
+        for entry_id, _ in entries:
+            state["delivered"] = int(entry_id.split("-")[0])
+            state["pending"][entry_id] = (consumer, self.now)
+        return [[stream, entries]] if entries else []
+
+    def xautoclaim(self, stream, group, consumer, min_idle_time, start_id="0-0", count=None):
+        state = self.groups[stream]
+        fields = dict(self.streams[stream])
+        claimed = []
+        for entry_id, (_, delivered_at) in list(state["pending"].items())[:count]:
+            if self.now - delivered_at >= min_idle_time:
+                state["pending"][entry_id] = (consumer, self.now)
+                claimed.append((entry_id, fields[entry_id]))
+        return ["0-0", claimed, []]
+
+    def xack(self, stream, group, *entry_ids):
+        pending = self.groups[stream]["pending"]
+        return sum(pending.pop(entry_id, None) is not None for entry_id in entry_ids)
+
+    def xdel(self, stream, *entry_ids):
+        entries = self.streams[stream]
+        self.streams[stream] = [entry for entry in entries if entry[0] not in entry_ids]
+        return len(entries) - len(self.streams[stream])
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value
+        return True
+
+    def delete(self, key):
+        return int(self.strings.pop(key, None) is not None)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+        return queue
+
+    def execute(self):
+        return [command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+@pytest.fixture(name="redis")
+def redis_fixture(monkeypatch):
+    redis = FakeStreams()
+    monkeypatch.setattr(data_pipeline.settings, "data_stream_batch_size", 2)
+    monkeypatch.setattr(data_pipeline.settings, "data_stream_claim_idle_ms", 1000)
+    ensure_group(redis)
+    return redis
+
+
+def results(redis: FakeStreams) -> dict:
+    return {fields["source"]: fields for _, fields in redis.streams.get(RESULT_STREAM, [])}
+
+
+class TestDataPipeline:
+    def test_ensure_group_is_idempotent(self, redis: FakeStreams):
+        ensure_group(redis)
+        assert list(redis.groups) == [INPUT_STREAM]
+
+    def test_processes_in_batches(self, redis: FakeStreams):
+        ids = append_records([{"n": n} for n in range(5)], redis)
+        assert len(set(ids)) == 5
+
+        assert [process_batch("worker-1", redis) for _ in range(4)] == [2, 2, 1, 0]
+
+        output = results(redis)
+        assert list(output) == ids
+        assert json.loads(output[ids[3]]["data"]) == {"status": "processed", "data": {"n": 3}}
+        assert redis.groups[INPUT_STREAM]["pending"] == {}
+
+    def test_only_processed_records_leave_input_stream(self, redis: FakeStreams):
+        ids = append_records([{"n": n} for n in range(3)], redis)
+        # Trimming by length could drop records no consumer has seen yet
+        assert redis.maxlen[INPUT_STREAM] is None
+
+        redis.xreadgroup(CONSUMER_GROUP, "worker-1", {INPUT_STREAM: ">"}, count=1)
+        assert process_batch("worker-2", redis) == 2
+
+        # The pending entry of worker-1 and nothing else is left
+        assert [entry_id for entry_id, _ in redis.streams[INPUT_STREAM]] == ids[:1]
+        assert redis.maxlen[RESULT_STREAM] is not None
+
+    def test_one_consumer_is_scheduled_at_a_time(self, redis: FakeStreams):
+        assert claim_consumer_slot(redis)
+        assert not claim_consumer_slot(redis)
+
+        release_consumer_slot(redis)
+        assert claim_consumer_slot(redis)
+
+    def test_consumers_share_the_stream(self, redis: FakeStreams):
+        ids = append_records([{"n": n} for n in range(4)], redis)
+
+        assert process_batch("worker-1", redis) == 2
+        assert process_batch("worker-2", redis) == 2
+        assert sorted(results(redis)) == sorted(ids)
+
+    def test_claims_entries_of_dead_consumer(self, redis: FakeStreams):
+        ids = append_records([{"n": 1}, {"n": 2}], redis)
+        # worker-1 reads a batch and dies before acknowledging it
+        redis.xreadgroup(CONSUMER_GROUP, "worker-1", {INPUT_STREAM: ">"}, count=2)
+
+        assert process_batch("worker-2", redis) == 0
+        redis.now += 1000
+        assert process_batch("worker-2", redis) == 2
+        assert list(results(redis)) == ids
+
+    def test_bad_record_is_reported_and_acknowledged(self, redis: FakeStreams):
+        entry_id = redis.xadd(INPUT_STREAM, {"data": "not json"})
+
+        assert process_batch("worker-1", redis) == 1
+        assert "error" in results(redis)[entry_id]
+        assert redis.groups[INPUT_STREAM]["pending"] == {}
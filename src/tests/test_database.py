@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.pool import StaticPool
+
+from src import database
+from src.auth.models import User
+from src.celery import init_worker_process, shutdown_worker_process
+from src.config import settings
+from src.database import get_sync_engine, session_scope
+
+
+@pytest.fixture(name="sync_engine")
+def sync_engine_fixture(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr("src.database._sync_engine", engine)
+    yield engine
+    engine.dispose()
+
+
+class TestSessionScope:
+    def test_commits_on_success(self, sync_engine):
+        with session_scope() as db:
+            db.add(User(username="testuser", email="test@example.com", hashed_password="hashed"))
+
+        with Session(sync_engine) as db:
+            assert db.exec(select(User.username)).all() == ["testuser"]
+
+    def test_rolls_back_on_error(self, sync_engine):
+        with pytest.raises(RuntimeError):
+            with session_scope() as db:
+                db.add(User(username="testuser", email="test@example.com", hashed_password="hashed"))
+                db.flush()
+                raise RuntimeError("boom")
+
+        with Session(sync_engine) as db:
+            assert db.exec(select(User)).all() == []
+
+
+class TestWorkerProcessHooks:
+    def test_child_builds_its_own_engine(self, sync_engine):
+        init_worker_process()
+        engine = get_sync_engine()
+
+        assert engine is not sync_engine
+        assert engine.pool.size() == settings.worker_db_pool_size
+
+        shutdown_worker_process()
+        assert database._sync_engine is None
@@ -0,0 +1,210 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel, select
+
+from src.config import settings
+from src.ingestion.cli import main as sources_cli
+from src.ingestion.models import DataSource, ExternalRecord
+from src.ingestion.service import ingest_sources
+from src.ingestion.tasks import ingest_data_sources
+
+
+class StubFeeds:
+    """
+    NDJSON feeds served by path, each with an ETag and Last-Modified that change
+    whenever the feed does.
+    """
+
+    def __init__(self):
+        self.feeds = {}
+        self.requests = []
+        self.version = 0
+
+    def set(self, path, records, raw_lines=()):
+        self.version += 1
+        body = "\n".join([json.dumps(record) for record in records] + list(raw_lines)) + "\n"
+        self.feeds[path] = (body.encode(), f'"v{self.version}"', f"Wed, {self.version:02d} Jul 2025 10:00:00 GMT")
+
+
+@pytest.fixture(name="stub_server")
+def stub_server_fixture():
+    feeds = StubFeeds()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            feeds.requests.append((self.path, dict(self.headers)))
+            if self.path not in feeds.feeds:
+                self.send_error(404)
+                return
+
+            body, etag, last_modified = feeds.feeds[self.path]
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    feeds.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield feeds
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(name="sync_engine")
+def sync_engine_fixture(monkeypatch, tmp_path):
+    # Sources are stored from several threads at once, so each needs a
+    # connection of its own rather than one shared in-memory database
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingestion.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr("src.database._sync_engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def add_sources(engine, stub_server, *paths, enabled=True):
+    with Session(engine) as db:
+        sources = [DataSource(name=path.strip("/"), url=f"{stub_server.base_url}{path}", enabled=enabled) for path in paths]
+        db.add_all(sources)
+        db.commit()
+        for source in sources:
+            db.refresh(source)
+        return sources
+
+
+def stored(engine):
+    with Session(engine) as db:
+        return {(record.source_id, record.external_id): record.data for record in db.exec(select(ExternalRecord)).all()}
+
+
+def load_source(engine, source_id):
+    with Session(engine) as db:
+        return db.get(DataSource, source_id)
+
+
+class TestIngestion:
+    async def test_fetches_and_upserts_in_batches(self, sync_engine, stub_server):
+        stub_server.set("/a", [{"id": i, "value": i} for i in range(5)], raw_lines=["not json", '{"no": "id"}'])
+        stub_server.set("/b", [{"id": "x", "value": 1}, {"id": "x", "value": 2}])
+        a, b = add_sources(sync_engine, stub_server, "/a", "/b")
+
+        results = await ingest_sources([a, b], concurrency=2, batch_size=2)
+
+        assert [(result["status"], result["records"], result["skipped"]) for result in results] == [(200, 5, 2), (200, 1, 0)]
+        records = stored(sync_engine)
+        assert len(records) == 6
+        assert records[(a.id, "3")] == {"id": 3, "value": 3}
+        # The last occurrence of a duplicated id wins
+        assert records[(b.id, "x")] == {"id": "x", "value": 2}
+        assert load_source(sync_engine, a.id).etag == stub_server.feeds["/a"][1]
+
+    async def test_unchanged_source_is_not_refetched(self, sync_engine, stub_server):
+        stub_server.set("/a", [{"id": 1, "value": "old"}])
+        source, = add_sources(sync_engine, stub_server, "/a")
+
+        await ingest_sources([source])
+        source = load_source(sync_engine, source.id)
+        result, = await ingest_sources([source])
+
+        assert result["status"] == 304 and result["records"] == 0
+        headers = stub_server.requests[-1][1]
+        assert headers["If-None-Match"] == source.etag
+        assert headers["If-Modified-Since"] == source.last_modified
+
+        stub_server.set("/a", [{"id": 1, "value": "new"}, {"id": 2, "value": "added"}])
+        result, = await ingest_sources([load_source(sync_engine, source.id)])
+
+        assert result["status"] == 200 and result["records"] == 2
+        assert stored(sync_engine)[(source.id, "1")] == {"id": 1, "value": "new"}
+
+    async def test_failed_source_keeps_validators(self, sync_engine, stub_server):
+        stub_server.set("/a", [{"id": 1}])
+        good, missing = add_sources(sync_engine, stub_server, "/a", "/missing")
+
+        results = await ingest_sources([good, missing])
+
+        assert results[0]["status"] == 200
+        assert results[1]["status"] == 404 and "error" in results[1]
+        missing = load_source(sync_engine, missing.id)
+        assert missing.etag is None and missing.last_status == 404 and missing.last_error
+
+    async def test_writes_are_limited_to_the_worker_pool(self, sync_engine, stub_server, monkeypatch):
+        monkeypatch.setattr(settings, "worker_db_pool_size", 1)
+        monkeypatch.setattr(settings, "worker_db_max_overflow", 1)
+        active, peak = [], []
+        lock = threading.Lock()
+
+        def slow_store(rows):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+            return len(rows)
+
+        monkeypatch.setattr("src.ingestion.service.store_records", slow_store)
+        paths = [f"/{name}" for name in "abcde"]
+        for path in paths:
+            stub_server.set(path, [{"id": 1}])
+
+        results = await ingest_sources(add_sources(sync_engine, stub_server, *paths), concurrency=5)
+
+        assert [result["records"] for result in results] == [1] * 5
+        assert max(peak) <= 2
+
+    def test_task_ingests_enabled_sources(self, sync_engine, stub_server):
+        stub_server.set("/a", [{"id": 1}, {"id": 2}])
+        stub_server.set("/b", [{"id": 1}])
+        add_sources(sync_engine, stub_server, "/a")
+        add_sources(sync_engine, stub_server, "/b", enabled=False)
+
+        summary = ingest_data_sources()
+
+        assert (summary["sources"], summary["updated"], summary["records"]) == (1, 1, 2)
+        assert ingest_data_sources()["not_modified"] == 1
+
+
+class TestSourcesCli:
+    def test_registers_and_toggles_sources(self, sync_engine, capsys):
+        sources_cli(["add", "weather", "https://example.com/a.ndjson"])
+        sources_cli(["disable", "weather"])
+
+        with Session(sync_engine) as db:
+            source = db.exec(select(DataSource)).one()
+            assert not source.enabled
+            source.etag = '"v1"'
+            db.add(source)
+            db.commit()
+
+        # Adding it again moves it to the new URL and enables it
+        sources_cli(["add", "weather", "https://example.com/b.ndjson"])
+        with Session(sync_engine) as db:
+            source = db.exec(select(DataSource)).one()
+        assert (source.url, source.enabled, source.etag) == ("https://example.com/b.ndjson", True, None)
+
+        capsys.readouterr()
+        sources_cli(["list"])
+        assert capsys.readouterr().out.startswith("weather\tenabled\thttps://example.com/b.ndjson")
+
+    def test_unknown_source(self, sync_engine):
+        with pytest.raises(SystemExit) as exit_info:
+            sources_cli(["enable", "missing"])
+        assert exit_info.value.code == 1
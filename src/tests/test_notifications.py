@@ -0,0 +1,241 @@
+import pytest
+
+from src import notifications
+from src.notifications import DUE_KEY, NotificationBatcher, NotificationBufferFull
+
+
+class FakeRedis:
+    """
+    The list, sorted set, SET NX and pipeline commands the batcher uses, with
+    its scripts emulated in Python. Lease expiry isn't modelled.
+    """
+
+    def __init__(self):
+        self.lists = {}
+        self.zsets = {}
+        self.strings = {}
+
+    def register_script(self, script):
+        run = {
+            notifications._ENQUEUE_SCRIPT: self._enqueue,
+            notifications._CLAIM_SCRIPT: self._claim,
+            notifications._RELEASE_SCRIPT: self._release,
+        }[script]
+
+        def call(keys, args, client=None):
+            if client is not None:
+                client.commands.append(lambda: run(keys, args))
+                return client
+            return run(keys, args)
+
+        return call
+
+    def _schedule(self, due_key, recipient, score):
+        due = self.zsets.setdefault(due_key, {})
+        if recipient not in due or due[recipient] > score:
+            due[recipient] = score
+
+    def _enqueue(self, keys, args):
+        buffer_key, due_key = keys
+        message, limit, batch_size, recipient, now, later = args
+        buffer = self.lists.setdefault(buffer_key, [])
+        if len(buffer) >= limit:
+            return -1
+        buffer.append(message)
+        if len(buffer) >= batch_size:
+            self._schedule(due_key, recipient, now)
+            return 1
+        self.zsets.setdefault(due_key, {}).setdefault(recipient, later)
+        return 0
+
+    def _claim(self, keys, args):
+        due_key, = keys
+        now, lease_until, limit, lease_prefix, _, token = args
+        due = self.zsets.get(due_key, {})
+        claimed = []
+        for recipient in sorted((r for r, score in due.items() if score <= now), key=due.get):
+            if len(claimed) < limit and self.set(lease_prefix + recipient, token, nx=True):
+                due[recipient] = lease_until
+                claimed.append(recipient)
+        return claimed
+
+    def _release(self, keys, args):
+        buffer_key, due_key, lease_key = keys
+        delivered, next_due, recipient, token = args
+        buffer = self.lists.setdefault(buffer_key, [])
+        if self.strings.get(lease_key) != token:
+            return len(buffer)
+        del buffer[:delivered]
+        self.strings.pop(lease_key)
+        if buffer:
+            self._schedule(due_key, recipient, next_due)
+        else:
+            self.zsets.get(due_key, {}).pop(recipient, None)
+        return len(buffer)
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value
+        return True
+
+    def lrange(self, key, start, end):
+        return list(self.lists.get(key, [])[start:end + 1])
+
+    def pipeline(self, transaction=True):
+        return FakePipeline()
+
+
+class FakePipeline:
+    def __init__(self):
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self):
+        return [command() for command in self.commands]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(name="scheduled")
+def scheduled_fixture(monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(notifications.celery_app, "send_task", scheduled.append)
+    return scheduled
+
+
+@pytest.fixture(name="clock")
+def clock_fixture():
+    return Clock()
+
+
+@pytest.fixture(name="batcher")
+def batcher_fixture(clock):
+    return NotificationBatcher(FakeRedis(), batch_size=3, window=2.0, buffer_limit=5, clock=clock)
+
+
+class Deliveries:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+
+    def __call__(self, recipient, messages):
+        if recipient in self.failing:
+            raise ConnectionError("unreachable")
+        self.sent.append((recipient, messages))
+
+
+class TestNotificationBatcher:
+    def test_buffers_are_due_after_window(self, batcher: NotificationBatcher, clock: Clock, scheduled):
+        batcher.enqueue("alice", "one")
+        batcher.enqueue("alice", "two")
+        batcher.enqueue("bob", "hello")
+        deliver = Deliveries()
+
+        assert batcher.flush_due(deliver) == {"recipients": 0, "sent": 0, "failed": 0}
+
+        clock.now += 2.0
+        assert batcher.flush_due(deliver) == {"recipients": 2, "sent": 3, "failed": 0}
+        assert sorted(deliver.sent) == [("alice", ["one", "two"]), ("bob", ["hello"])]
+        # No task per message or per recipient, the periodic flush picks them up
+        assert scheduled == []
+        assert batcher.client.zsets[DUE_KEY] == {}
+
+    def test_full_batch_is_due_at_once(self, batcher: NotificationBatcher, scheduled):
+        for message in ("one", "two", "three", "four", "five"):
+            batcher.enqueue("alice", message)
+        batcher.enqueue_many([("alice", "six"), ("bob", "one")])
+
+        # Full buffers start a single early flush between them
+        assert scheduled == [notifications.FLUSH_TASK]
+
+        deliver = Deliveries()
+        batcher.flush_due(deliver)
+        # The backlog beyond one batch goes out in the same run
+        assert deliver.sent == [("alice", ["one", "two", "three"]), ("alice", ["four", "five"])]
+
+    def test_failed_delivery_keeps_messages(self, batcher: NotificationBatcher, clock: Clock, scheduled):
+        batcher.enqueue("alice", "one")
+        batcher.enqueue("bob", "hello")
+        clock.now += 2.0
+
+        totals = batcher.flush_due(Deliveries(failing={"alice"}))
+
+        assert totals == {"recipients": 1, "sent": 1, "failed": 1}
+        assert batcher.client.lists["notify:buffer:alice"] == ["one"]
+        # Retried a window later
+        assert batcher.flush_due(Deliveries()) == {"recipients": 0, "sent": 0, "failed": 0}
+        clock.now += 2.0
+        deliver = Deliveries()
+        batcher.flush_due(deliver)
+        assert deliver.sent == [("alice", ["one"])]
+
+    def test_claimed_recipient_is_skipped(self, batcher: NotificationBatcher, clock: Clock, scheduled):
+        batcher.enqueue("alice", "one")
+        clock.now += 2.0
+
+        assert batcher.claim("first") == ["alice"]
+        assert batcher.claim("second") == []
+
+        # A flusher whose lease went elsewhere leaves the buffer alone
+        assert batcher.release("alice", "second", 1) == 1
+        assert batcher.flush("alice", "first", Deliveries()) == 1
+        assert batcher.client.lists["notify:buffer:alice"] == []
+
+    def test_claim_skips_leased_recipients(self, batcher: NotificationBatcher, clock: Clock, scheduled):
+        batcher.enqueue("alice", "one")
+        clock.now += 1.0
+        batcher.enqueue("bob", "hello")
+        clock.now += 2.0
+
+        assert batcher.claim("first", limit=1) == ["alice"]
+        # A full batch makes Alice due again while her lease is held
+        batcher.enqueue("alice", "two")
+        batcher.enqueue("alice", "three")
+        assert batcher.client.zsets[DUE_KEY]["alice"] == clock.now
+
+        # The next flusher moves past her to Bob
+        assert batcher.claim("second", limit=1) == ["bob"]
+        assert batcher.claim("third", limit=1) == []
+
+    def test_message_during_delivery_stays_due(self, batcher: NotificationBatcher, clock: Clock, scheduled):
+        batcher.enqueue("alice", "one")
+        clock.now += 2.0
+
+        def deliver(recipient, messages):
+            batcher.enqueue("alice", "two")
+
+        assert batcher.claim("token") == ["alice"]
+        assert batcher.flush("alice", "token", deliver) == 1
+        assert batcher.client.lists["notify:buffer:alice"] == ["two"]
+        assert batcher.client.zsets[DUE_KEY] == {"alice": clock.now}
+
+    def test_backpressure(self, batcher: NotificationBatcher, scheduled):
+        for i in range(5):
+            batcher.enqueue("alice", str(i))
+
+        with pytest.raises(NotificationBufferFull):
+            batcher.enqueue("alice", "overflow")
+
+        batcher.flush_due(Deliveries())
+        batcher.enqueue("alice", "accepted")
+
+    def test_enqueue_many(self, batcher: NotificationBatcher, scheduled):
+        for i in range(5):
+            batcher.enqueue("alice", str(i))
+
+        rejected = batcher.enqueue_many([("alice", "late"), ("bob", "one"), ("carol", "one")])
+
+        assert rejected == ["alice"]
+        assert sorted(batcher.client.zsets[DUE_KEY]) == ["alice", "bob", "carol"]
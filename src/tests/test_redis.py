@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+import redis
+
+from src import redis as redis_module
+from src.redis import RedisStats, _call
+
+
+@pytest.fixture(name="redis_stats", autouse=True)
+def redis_stats_fixture(monkeypatch):
+    stats = RedisStats()
+    monkeypatch.setattr(redis_module, "redis_stats", stats)
+    return stats
+
+
+class TestRedisCall:
+    async def test_records_latency(self, redis_stats: RedisStats):
+        async def command():
+            return "OK"
+
+        assert await _call("get", command()) == "OK"
+        assert await _call("get", command()) == "OK"
+
+        stats = redis_stats.stats()["get"]
+        assert stats["calls"] == 2
+        assert stats["errors"] == 0 and stats["timeouts"] == 0
+
+    async def test_timeout_raises_redis_error(self, redis_stats: RedisStats, monkeypatch):
+        monkeypatch.setattr(redis_module.settings, "redis_command_timeout", 0.01)
+
+        with pytest.raises(redis.TimeoutError):
+            await _call("get", asyncio.sleep(1))
+
+        assert redis_stats.stats()["get"]["timeouts"] == 1
+
+    async def test_counts_errors(self, redis_stats: RedisStats):
+        async def command():
+            raise redis.ConnectionError("down")
+
+        with pytest.raises(redis.ConnectionError):
+            await _call("incr", command())
+
+        assert redis_stats.stats()["incr"]["errors"] == 1
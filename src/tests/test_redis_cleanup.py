@@ -0,0 +1,100 @@
+import fnmatch
+
+import pytest
+
+from src.redis_cleanup import CleanupPolicy, RedisCleaner
+
+
+class FakeRedis:
+    def __init__(self, keys):
+        # key -> TTL in seconds, None for keys without one
+        self.keys = dict(keys)
+        self.scan_counts = []
+        self.pipelines = 0
+
+    def scan_iter(self, match=None, count=None):
+        self.scan_counts.append(count)
+        return iter([key for key in list(self.keys) if fnmatch.fnmatchcase(key, match)])
+
+    def pipeline(self, transaction=True):
+        self.pipelines += 1
+        return FakePipeline(self)
+
+    def unlink(self, *keys):
+        return sum(self.keys.pop(key, False) is not False for key in keys)
+
+    def expire(self, key, seconds, nx=False):
+        if key not in self.keys or (nx and self.keys[key] is not None):
+            return False
+        self.keys[key] = seconds
+        return True
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+        return queue
+
+    def execute(self):
+        return [command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+@pytest.fixture(name="redis")
+def redis_fixture():
+    keys = {f"temp_{i}": None for i in range(7)}
+    keys.update({"cache:a": None, "cache:b": 60, "session:x": None})
+    return FakeRedis(keys)
+
+
+class TestRedisCleaner:
+    def test_unlinks_in_batches(self, redis: FakeRedis):
+        cleaner = RedisCleaner(redis, scan_count=1000, batch_size=3, max_ops_per_second=0)
+
+        totals = cleaner.apply(CleanupPolicy("temp_*"))
+
+        assert totals == {"scanned": 7, "deleted": 7, "expired": 0}
+        assert redis.pipelines == 3
+        assert redis.scan_counts == [1000]
+        assert sorted(redis.keys) == ["cache:a", "cache:b", "session:x"]
+
+    def test_expire_policy_keeps_existing_ttls(self, redis: FakeRedis):
+        cleaner = RedisCleaner(redis, batch_size=10, max_ops_per_second=0)
+
+        totals = cleaner.apply(CleanupPolicy("cache:*", expire=3600))
+
+        assert totals == {"scanned": 2, "deleted": 0, "expired": 1}
+        assert redis.keys["cache:a"] == 3600
+        assert redis.keys["cache:b"] == 60
+
+    def test_run_reports_totals(self, redis: FakeRedis):
+        cleaner = RedisCleaner(redis, batch_size=4, max_ops_per_second=0)
+        progress = []
+
+        report = cleaner.run([CleanupPolicy("temp_*"), CleanupPolicy("session:*")], progress.append)
+
+        assert report["deleted"] == 8 and report["scanned"] == 8
+        assert [policy["pattern"] for policy in report["policies"]] == ["temp_*", "session:*"]
+        assert progress[-1] == {"pattern": "session:*", "scanned": 1, "deleted": 1, "expired": 0}
+        assert len(progress) == 3
+
+    def test_throttles_to_rate(self, redis: FakeRedis):
+        sleeps = []
+        cleaner = RedisCleaner(
+            redis, batch_size=2, max_ops_per_second=4, clock=lambda: 0.0, sleep=sleeps.append
+        )
+
+        cleaner.apply(CleanupPolicy("temp_*"))
+
+        # With the clock standing still, every batch waits out its share of the budget
+        assert sleeps == [0.5, 1.0, 1.5, 1.75]
@@ -1,33 +1,145 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import time
+from contextlib import nullcontext
+from types import SimpleNamespace
+
 import pytest
-from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
 from fastapi import FastAPI
-from sqlmodel import Session, create_engine, SQLModel
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.pool import StaticPool
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from src.tasks.controller import router as tasks_router
-from src.tasks.service import TaskService
-from src.tasks.models import TaskCreate
+from src.config import settings
+from src.tasks.cache import TaskListCache
+from src.celery import celery_app
+from src.pubsub import PubSubHub
+from src.tasks.events import sse_stream
+from src.tasks.job_status import get_job_statuses, stream_job_statuses
+from src.tasks.reminders import due_task_batches
+from src.tasks.tasks import (
+    cleanup_import_uploads,
+    periodic_add_random_task,
+    send_deadline_reminders,
+    seed_random_tasks_chunk,
+    summarize_random_task_seeding,
+    user_id_ranges,
+)
+from src.tasks.importer import import_tasks_file, parse_import_rows
+from src.tasks.service import TaskService, utcnow
+from src.tasks.models import Task, TaskBulkRequest, TaskCreate, TaskUpdate
 from src.auth.models import User
-from src.database import get_session
+from src.database import get_session, get_session_factory
 from uuid import uuid4
 
 
 # Test database setup
 @pytest.fixture(name="session")
-def session_fixture():
+async def session_fixture():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    await engine.dispose()
+
+
+class FakeCachePipeline:
+    def __init__(self, store: dict):
+        self.store = store
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, key, value, nx=False):
+        def command():
+            if nx and key in self.store:
+                return None
+            self.store[key] = value
+            return True
+        self.commands.append(command)
+
+    def incr(self, key):
+        def command():
+            self.store[key] = str(int(self.store.get(key, 0)) + 1)
+            return int(self.store[key])
+        self.commands.append(command)
+
+    def execute(self):
+        return [command() for command in self.commands]
+
+
+@pytest.fixture(name="redis_store", autouse=True)
+def redis_store_fixture(monkeypatch):
+    store = {}
+
+    async def fake_get_value(key):
+        return store.get(key)
+
+    async def fake_set_value(key, value, expire=None):
+        store[key] = value
+
+    async def fake_mget_values(*keys):
+        return [store.get(key) for key in keys]
+
+    async def fake_set_if_absent(key, value):
+        if key in store:
+            return False
+        store[key] = value
+        return True
+
+    async def fake_run_pipeline(build, transaction=False, name="pipeline"):
+        pipe = FakeCachePipeline(store)
+        build(pipe)
+        return pipe.execute()
+
+    monkeypatch.setattr("src.tasks.cache.get_value", fake_get_value)
+    monkeypatch.setattr("src.tasks.cache.set_value", fake_set_value)
+    monkeypatch.setattr("src.tasks.cache.mget_values", fake_mget_values)
+    monkeypatch.setattr("src.tasks.cache.set_if_absent", fake_set_if_absent)
+    async def fake_publish(channel, message):
+        store.setdefault(channel, []).append(message)
+        return 1
+
+    monkeypatch.setattr("src.tasks.cache.run_pipeline", fake_run_pipeline)
+    monkeypatch.setattr("src.tasks.events.publish", fake_publish)
+    monkeypatch.setattr("src.tasks.service.task_list_cache", TaskListCache(ttl=300))
+    return store
+
+
+@pytest.fixture(name="sync_engine")
+def sync_engine_fixture(monkeypatch):
     engine = create_engine(
-        "sqlite:///:memory:",
+        "sqlite://",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool
     )
     SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
+    monkeypatch.setattr("src.database._sync_engine", engine)
+    yield engine
+    engine.dispose()
 
 
 @pytest.fixture(name="test_user")
-def test_user_fixture(session: Session):
+async def test_user_fixture(session: AsyncSession):
     user = User(
         id=uuid4(),
         username="testuser",
@@ -36,13 +148,13 @@ def test_user_fixture(session: Session):
         disabled=False
     )
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     return user
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session, test_user: User):
+async def client_fixture(session: AsyncSession, test_user: User):
     def get_session_override():
         return session
 
@@ -52,54 +164,55 @@ def client_fixture(session: Session, test_user: User):
     app = FastAPI()
     app.include_router(tasks_router)
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_session_factory] = lambda: lambda: nullcontext(session)
 
     # Mock the auth dependency
     from src.auth.service import get_current_active_user
     app.dependency_overrides[get_current_active_user] = get_current_active_user_override
 
-    client = TestClient(app)
-    yield client
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
     app.dependency_overrides.clear()
 
 
 class TestTaskService:
-    def test_create_task(self, session: Session, test_user: User):
+    async def test_create_task(self, session: AsyncSession, test_user: User):
         task_data = TaskCreate(
             title="Test Task",
             description="Test Description"
         )
-        task = TaskService.create_task(task_data, test_user, session)
+        task = await TaskService.create_task(task_data, test_user, session)
 
         assert task.title == "Test Task"
         assert task.description == "Test Description"
         assert task.user_id == test_user.id
         assert task.completed is False
 
-    def test_create_task_with_deadline(self, session: Session, test_user: User):
+    async def test_create_task_with_deadline(self, session: AsyncSession, test_user: User):
         deadline = datetime(2024, 12, 31, 23, 59, 59)
         task_data = TaskCreate(
             title="Test Task",
             description="Test Description",
             deadline=deadline
         )
-        task = TaskService.create_task(task_data, test_user, session)
+        task = await TaskService.create_task(task_data, test_user, session)
 
         assert task.deadline == deadline
 
-    def test_get_all_tasks(self, session: Session, test_user: User):
+    async def test_get_all_tasks(self, session: AsyncSession, test_user: User):
         # Create test tasks
         task_data1 = TaskCreate(title="Task 1", description="Description 1")
         task_data2 = TaskCreate(title="Task 2", description="Description 2")
 
-        TaskService.create_task(task_data1, test_user, session)
-        TaskService.create_task(task_data2, test_user, session)
+        await TaskService.create_task(task_data1, test_user, session)
+        await TaskService.create_task(task_data2, test_user, session)
 
-        tasks = TaskService.get_all_tasks(test_user, session)
+        tasks = await TaskService.get_all_tasks(test_user, session)
         assert len(tasks) == 2
         assert tasks[0].title == "Task 1"
         assert tasks[1].title == "Task 2"
 
-    def test_get_all_tasks_user_specific(self, session: Session, test_user: User):
+    async def test_get_all_tasks_user_specific(self, session: AsyncSession, test_user: User):
         # Create another user
         other_user = User(
             id=uuid4(),
@@ -109,39 +222,142 @@ class TestTaskService:
             disabled=False
         )
         session.add(other_user)
-        session.commit()
+        await session.commit()
 
         # Create tasks for both users
         task_data1 = TaskCreate(title="User 1 Task", description="Description")
         task_data2 = TaskCreate(title="User 2 Task", description="Description")
 
-        TaskService.create_task(task_data1, test_user, session)
-        TaskService.create_task(task_data2, other_user, session)
+        await TaskService.create_task(task_data1, test_user, session)
+        await TaskService.create_task(task_data2, other_user, session)
 
-        tasks = TaskService.get_all_tasks(test_user, session)
+        tasks = await TaskService.get_all_tasks(test_user, session)
         assert len(tasks) == 1
         assert tasks[0].title == "User 1 Task"
 
-    def test_update_task(self, session: Session, test_user: User):
+    async def test_list_tasks_keyset_pagination(self, session: AsyncSession, test_user: User):
+        for i in range(5):
+            await TaskService.create_task(TaskCreate(title=f"Task {i}", description="Description"), test_user, session)
+
+        page1, cursor = await TaskService.list_tasks(test_user, session, limit=2)
+        page2, cursor = await TaskService.list_tasks(test_user, session, limit=2, after=cursor)
+        page3, cursor = await TaskService.list_tasks(test_user, session, limit=2, after=cursor)
+
+        assert [t.title for t in page1 + page2 + page3] == [f"Task {i}" for i in range(5)]
+        assert cursor is None
+
+    async def test_list_tasks_filters(self, session: AsyncSession, test_user: User):
+        await TaskService.create_task(TaskCreate(title="No deadline", description="Description"), test_user, session)
+        await TaskService.create_task(
+            TaskCreate(title="Early", description="Description", deadline=datetime(2024, 1, 1)), test_user, session
+        )
+        late = await TaskService.create_task(
+            TaskCreate(title="Late", description="Description", deadline=datetime(2024, 6, 1)), test_user, session
+        )
+        late.completed = True
+        session.add(late)
+        await session.commit()
+
+        tasks, _ = await TaskService.list_tasks(test_user, session, completed=False)
+        assert [t.title for t in tasks] == ["No deadline", "Early"]
+
+        tasks, _ = await TaskService.list_tasks(test_user, session, deadline_from=datetime(2024, 3, 1))
+        assert [t.title for t in tasks] == ["Late"]
+
+        tasks, _ = await TaskService.list_tasks(test_user, session, deadline_to=datetime(2024, 3, 1))
+        assert [t.title for t in tasks] == ["Early"]
+
+    async def test_search_tasks(self, session: AsyncSession, test_user: User):
+        for title in ("Fix login bug", "Write docs", "Fix signup bug"):
+            await TaskService.create_task(TaskCreate(title=title, description="Description"), test_user, session)
+        await TaskService.create_task(TaskCreate(title="Review", description="Found a BUG in review"), test_user, session)
+
+        page, cursor = await TaskService.search_tasks(test_user, session, "bug", limit=2)
+        rest, last_cursor = await TaskService.search_tasks(test_user, session, "bug", limit=2, after=cursor)
+
+        assert [t.title for t in page + rest] == ["Fix login bug", "Fix signup bug", "Review"]
+        assert last_cursor is None
+
+    async def test_search_matches_wildcards_literally(self, session: AsyncSession, test_user: User):
+        for title in ("Raise to 100%", "Raise to 1000", "snake_case", "snakeXcase"):
+            await TaskService.create_task(TaskCreate(title=title, description="Description"), test_user, session)
+
+        for q, expected in (("100%", ["Raise to 100%"]), ("e_c", ["snake_case"]), ("%", ["Raise to 100%"])):
+            page, _ = await TaskService.search_tasks(test_user, session, q)
+            assert [t.title for t in page] == expected
+
+    def test_search_vector_is_created_on_postgresql_only(self):
+        ddl = str(CreateTable(Task.__table__).compile(dialect=postgresql.dialect()))
+        assert "search_vector TSVECTOR GENERATED ALWAYS AS" in ddl
+        assert "search_vector" not in str(CreateTable(Task.__table__).compile(dialect=sqlite.dialect()))
+        # Never loaded with a task
+        assert "search_vector" not in str(select(Task))
+
+    async def test_list_open_by_deadline(self, session: AsyncSession, test_user: User):
+        now = utcnow()
+        for title, offset in (("Overdue", -2), ("Soon", 1), ("Later", 10), ("Soon 2", 5)):
+            await TaskService.create_task(
+                TaskCreate(title=title, description="Description", deadline=now + timedelta(hours=offset)), test_user, session
+            )
+        done = await TaskService.create_task(
+            TaskCreate(title="Done", description="Description", deadline=now + timedelta(hours=1)), test_user, session
+        )
+        await TaskService.patch_task(done.id, TaskUpdate(completed=True), test_user, session)
+
+        page, cursor = await TaskService.list_open_by_deadline(
+            test_user, session, deadline_from=now, deadline_to=now + timedelta(hours=24), limit=2
+        )
+        rest, last_cursor = await TaskService.list_open_by_deadline(
+            test_user, session, deadline_from=now, deadline_to=now + timedelta(hours=24), limit=2, after=cursor
+        )
+        assert [t.title for t in page + rest] == ["Soon", "Soon 2", "Later"]
+        assert last_cursor is None
+
+        overdue, _ = await TaskService.list_open_by_deadline(test_user, session, deadline_to=now)
+        assert [t.title for t in overdue] == ["Overdue"]
+
+        summary = await TaskService.get_deadline_summary(test_user, session, window_hours=2)
+        assert (summary.overdue, summary.due_soon) == (1, 1)
+
+    async def test_update_task(self, session: AsyncSession, test_user: User):
         # Create a task
         task_data = TaskCreate(title="Original Title", description="Original Description")
-        task = TaskService.create_task(task_data, test_user, session)
+        task = await TaskService.create_task(task_data, test_user, session)
 
         # Update the task
         update_data = TaskCreate(title="Updated Title", description="Updated Description")
-        updated_task = TaskService.update_task(task.id, update_data, test_user, session)
+        updated_task = await TaskService.update_task(task.id, update_data, test_user, session)
 
         assert updated_task is not None
         assert updated_task.title == "Updated Title"
         assert updated_task.description == "Updated Description"
 
-    def test_update_nonexistent_task(self, session: Session, test_user: User):
+    async def test_patch_task(self, session: AsyncSession, test_user: User):
+        deadline = datetime(2024, 12, 31, 23, 59, 59)
+        task = await TaskService.create_task(
+            TaskCreate(title="Original Title", description="Original Description", deadline=deadline), test_user, session
+        )
+
+        patched = await TaskService.patch_task(task.id, TaskUpdate(completed=True), test_user, session)
+        assert patched.completed is True
+        assert patched.title == "Original Title"
+        assert patched.deadline == deadline
+
+        patched = await TaskService.patch_task(task.id, TaskUpdate(deadline=None), test_user, session)
+        assert patched.deadline is None
+        assert patched.completed is True
+
+    async def test_patch_task_rejects_null_title(self):
+        with pytest.raises(ValueError):
+            TaskUpdate(title=None)
+
+    async def test_update_nonexistent_task(self, session: AsyncSession, test_user: User):
         update_data = TaskCreate(title="Updated Title", description="Updated Description")
-        updated_task = TaskService.update_task(999, update_data, test_user, session)
+        updated_task = await TaskService.update_task(999, update_data, test_user, session)
 
         assert updated_task is None
 
-    def test_update_other_user_task(self, session: Session, test_user: User):
+    async def test_update_other_user_task(self, session: AsyncSession, test_user: User):
         # Create another user and their task
         other_user = User(
             id=uuid4(),
@@ -151,71 +367,830 @@ class TestTaskService:
             disabled=False
         )
         session.add(other_user)
-        session.commit()
+        await session.commit()
 
         task_data = TaskCreate(title="Other User Task", description="Description")
-        other_task = TaskService.create_task(task_data, other_user, session)
+        other_task = await TaskService.create_task(task_data, other_user, session)
 
         # Try to update other user's task
         update_data = TaskCreate(title="Hacked", description="Hacked")
-        updated_task = TaskService.update_task(other_task.id, update_data, test_user, session)
+        updated_task = await TaskService.update_task(other_task.id, update_data, test_user, session)
 
         assert updated_task is None
 
-    def test_delete_task(self, session: Session, test_user: User):
+    async def test_delete_task(self, session: AsyncSession, test_user: User):
         # Create a task
         task_data = TaskCreate(title="To Delete", description="Description")
-        task = TaskService.create_task(task_data, test_user, session)
+        task = await TaskService.create_task(task_data, test_user, session)
 
         # Delete the task
-        deleted_task = TaskService.delete_task(task.id, test_user, session)
+        deleted_task = await TaskService.delete_task(task.id, test_user, session)
 
         assert deleted_task is not None
         assert deleted_task.id == task.id
 
         # Verify task is deleted
-        tasks = TaskService.get_all_tasks(test_user, session)
+        tasks = await TaskService.get_all_tasks(test_user, session)
         assert len(tasks) == 0
 
-    def test_delete_nonexistent_task(self, session: Session, test_user: User):
-        deleted_task = TaskService.delete_task(999, test_user, session)
+    async def test_delete_nonexistent_task(self, session: AsyncSession, test_user: User):
+        deleted_task = await TaskService.delete_task(999, test_user, session)
         assert deleted_task is None
 
+    async def test_delete_locks_sync_state_before_task(self, session: AsyncSession, test_user: User):
+        task = await TaskService.create_task(TaskCreate(title="To Delete", description="Description"), test_user, session)
+        task_id, version = task.id, task.version
+        statements = []
+        engine = session.bind.sync_engine
+        listener = lambda conn, cursor, statement, *args: statements.append(statement.split()[0:3])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            await TaskService.delete_task(task_id, test_user, session)
+            await TaskService.delete_task(999, test_user, session)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        # Same order as updates: the task_sync_state upsert comes before the DELETE
+        writes = [" ".join(words) for words in statements if words[0] in ("INSERT", "DELETE")]
+        assert writes[:2] == ["INSERT INTO task_sync_state", "DELETE FROM task"]
+        changes = await TaskService.get_changes(test_user, session, since=version)
+        assert changes.deleted == [task_id]
+
+    async def test_get_changes(self, session: AsyncSession, test_user: User):
+        first = await TaskService.create_task(TaskCreate(title="First", description="Description"), test_user, session)
+        second = await TaskService.create_task(TaskCreate(title="Second", description="Description"), test_user, session)
+
+        full = await TaskService.get_changes(test_user, session)
+        assert full.version == second.version == first.version + 1
+        assert [t.title for t in full.changed] == ["First", "Second"]
+        assert full.deleted == []
+
+        await TaskService.patch_task(first.id, TaskUpdate(completed=True), test_user, session)
+        await TaskService.delete_task(second.id, test_user, session)
+
+        delta = await TaskService.get_changes(test_user, session, since=full.version)
+        assert [(t.id, t.completed) for t in delta.changed] == [(first.id, True)]
+        assert delta.deleted == [second.id]
+        assert delta.version == full.version + 2
+
+        empty = await TaskService.get_changes(test_user, session, since=delta.version)
+        assert empty.changed == [] and empty.deleted == []
+        assert empty.version == delta.version
+
+
+class TestTaskBulk:
+    async def test_bulk_apply(self, session: AsyncSession, test_user: User):
+        keep = await TaskService.create_task(TaskCreate(title="Keep", description="Description"), test_user, session)
+        remove = await TaskService.create_task(TaskCreate(title="Remove", description="Description"), test_user, session)
+
+        result = await TaskService.bulk_apply(
+            TaskBulkRequest(
+                create=[
+                    {"title": "New 1", "description": "Description"},
+                    {"title": "x" * 101, "description": "Description"},
+                    {"title": "New 2", "description": "Description"},
+                ],
+                update=[
+                    {"id": keep.id, "completed": True},
+                    {"id": 999, "title": "Missing"},
+                    {"id": keep.id, "title": None},
+                ],
+                delete=[remove.id, 999],
+            ),
+            test_user,
+            session,
+        )
+
+        assert [t.title for t in result.created] == ["New 1", "New 2"]
+        assert all(t.user_id == test_user.id for t in result.created)
+        assert [(t.id, t.title, t.completed) for t in result.updated] == [(keep.id, "Keep", True)]
+        assert result.deleted == [remove.id]
+        assert sorted((e.op, e.index) for e in result.errors) == [
+            ("create", 1), ("delete", 1), ("update", 1), ("update", 2)
+        ]
+
+        tasks = await TaskService.get_all_tasks(test_user, session)
+        assert sorted(t.title for t in tasks) == ["Keep", "New 1", "New 2"]
+
+    async def test_bulk_apply_other_user_task(self, session: AsyncSession, test_user: User):
+        other_user = User(
+            id=uuid4(),
+            username="otheruser",
+            email="other@example.com",
+            hashed_password="hashed_password",
+            disabled=False
+        )
+        session.add(other_user)
+        await session.commit()
+        other_task = await TaskService.create_task(TaskCreate(title="Other", description="Description"), other_user, session)
+
+        result = await TaskService.bulk_apply(
+            TaskBulkRequest(update=[{"id": other_task.id, "title": "Hacked"}], delete=[other_task.id]),
+            test_user,
+            session,
+        )
+
+        assert result.updated == [] and result.deleted == []
+        assert len(result.errors) == 2
+        assert (await TaskService.get_all_tasks(other_user, session))[0].title == "Other"
+
+    async def test_bulk_apply_shares_one_version(self, session: AsyncSession, test_user: User):
+        keep = await TaskService.create_task(TaskCreate(title="Keep", description="Description"), test_user, session)
+        remove = await TaskService.create_task(TaskCreate(title="Remove", description="Description"), test_user, session)
+
+        result = await TaskService.bulk_apply(
+            TaskBulkRequest(
+                create=[{"title": "New", "description": "Description"}],
+                update=[{"id": keep.id, "completed": True}],
+                delete=[remove.id],
+            ),
+            test_user,
+            session,
+        )
+
+        changes = await TaskService.get_changes(test_user, session, since=remove.version)
+        assert {t.version for t in result.created + result.updated} == {changes.version}
+        assert sorted(t.title for t in changes.changed) == ["Keep", "New"]
+        assert changes.deleted == [remove.id]
+
+
+class FakeCopyCursor:
+    def __init__(self):
+        self.copied = []
+        self.copies = 0
+        self.statements = []
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+        if sql.startswith("INSERT"):
+            self.rowcount = len(self.copied)
+
+    def fetchone(self):
+        return (7,)
+
+    def copy_expert(self, sql, buffer):
+        self.copies += 1
+        self.copied.extend(csv.reader(buffer))
+
+
+class TestTaskImporter:
+    def test_parse_csv_rows(self):
+        lines = io.StringIO(
+            "title,description,deadline\n"
+            "Task 1,Description,2024-12-31T10:00:00\n"
+            "Task 2,,\n"
+            "Task 3,Description,\n"
+        )
+        rows = list(parse_import_rows(lines, "csv"))
+
+        assert rows[0][1].deadline == datetime(2024, 12, 31, 10, 0)
+        assert isinstance(rows[1][1], str) and "description" in rows[1][1]
+        assert rows[2][1].deadline is None
+        assert [number for number, _ in rows] == [2, 3, 4]
+
+    def test_parse_ndjson_rows(self):
+        lines = [
+            json.dumps({"title": "Task 1", "description": "Description"}),
+            "",
+            "not json",
+            json.dumps({"title": "x" * 101, "description": "Description"}),
+        ]
+        rows = list(parse_import_rows(lines, "ndjson"))
+
+        assert rows[0][1].title == "Task 1"
+        assert [number for number, row in rows if isinstance(row, str)] == [3, 4]
+
+    def test_import_tasks_file_copies_in_chunks(self, tmp_path):
+        path = tmp_path / "tasks.ndjson"
+        path.write_text("\n".join(
+            [json.dumps({"title": f"Task {i}", "description": "Description"}) for i in range(5)] + ["{}"]
+        ))
+        cursor = FakeCopyCursor()
+        connection = SimpleNamespace(cursor=lambda: cursor, commit=lambda: None)
+        progress_updates = []
+        user_id = uuid4()
+
+        result = import_tasks_file(
+            connection, str(path), "ndjson", user_id, chunk_size=2,
+            on_progress=lambda progress: progress_updates.append(progress["processed"]),
+        )
+
+        assert cursor.copies == 3
+        assert [row[0] for row in cursor.copied] == [f"Task {i}" for i in range(5)]
+        sync_sql, sync_params = cursor.statements[-2]
+        assert sync_sql.startswith("INSERT INTO task_sync_state") and sync_params["user_id"] == str(user_id)
+        assert cursor.statements[-1][1] == (str(user_id), 7)
+        assert progress_updates == [2, 4]
+        assert result["imported"] == 5
+        assert result["rejected"] == 1
+        assert result["errors"][0]["row"] == 6
+
+
+    def test_cleanup_import_uploads(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "import_dir", str(tmp_path))
+        stale, fresh, other = tmp_path / "stale.upload", tmp_path / "fresh.upload", tmp_path / "notes.txt"
+        for path in (stale, fresh, other):
+            path.write_text("title,description\n")
+        old = time.time() - settings.import_upload_ttl - 60
+        os.utime(stale, (old, old))
+        os.utime(other, (old, old))
+
+        assert cleanup_import_uploads() == {"removed": 1}
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["fresh.upload", "notes.txt"]
+
+    def test_cleanup_import_uploads_without_volume(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "import_dir", str(tmp_path / "missing"))
+
+        assert cleanup_import_uploads() == {"removed": 0}
+
+class TestTaskListCache:
+    async def test_serves_cached_list_until_mutation(self, session: AsyncSession, test_user: User):
+        await TaskService.create_task(TaskCreate(title="Task 1", description="Description"), test_user, session)
+        cache = TaskListCache(ttl=300)
+        loads = []
+
+        async def loader():
+            loads.append(1)
+            return await TaskService.get_all_tasks(test_user, session)
+
+        first = await cache.get_or_load(test_user.id, loader)
+        second = await cache.get_or_load(test_user.id, loader)
+        assert first == second
+        assert len(loads) == 1
+
+        await cache.bump(test_user.id)
+        await cache.get_or_load(test_user.id, loader)
+        assert len(loads) == 2
+        assert cache.stats() == {"hits": 1, "misses": 2, "errors": 0}
+
+    async def test_list_loaded_during_mutation_is_not_served(self, session: AsyncSession, test_user: User):
+        cache = TaskListCache(ttl=300)
+
+        async def racing_loader():
+            tasks = await TaskService.get_all_tasks(test_user, session)
+            # A writer commits and bumps the version while this read is in flight
+            session.add(Task(title="Task 1", description="Description", user_id=test_user.id))
+            await session.commit()
+            await cache.bump(test_user.id)
+            return tasks
+
+        assert await cache.get_or_load(test_user.id, racing_loader) == "[]"
+
+        async def loader():
+            return await TaskService.get_all_tasks(test_user, session)
+
+        assert "Task 1" in await cache.get_or_load(test_user.id, loader)
+
+
+    async def test_bump_reseeds_evicted_version(self, session: AsyncSession, test_user: User, redis_store: dict):
+        cache = TaskListCache(ttl=300)
+        loads = []
+
+        async def loader():
+            loads.append(1)
+            return await TaskService.get_all_tasks(test_user, session)
+
+        await cache.get_or_load(test_user.id, loader)
+        seeded = int(redis_store[f"tasks:version:{test_user.id}"])
+
+        # The counter is evicted; the bump must not restart it at 1
+        del redis_store[f"tasks:version:{test_user.id}"]
+        await cache.bump(test_user.id)
+        assert int(redis_store[f"tasks:version:{test_user.id}"]) > seeded
+
+        await cache.get_or_load(test_user.id, loader)
+        assert len(loads) == 2
+
+    def test_bump_sync_reseeds_evicted_version(self, redis_store: dict, monkeypatch):
+        monkeypatch.setattr("src.tasks.cache.redis_client", SimpleNamespace(pipeline=lambda transaction: FakeCachePipeline(redis_store)))
+        cache = TaskListCache(ttl=300)
+        user_id = uuid4()
+
+        cache.bump_many_sync([user_id])
+
+        assert int(redis_store[f"tasks:version:{user_id}"]) > 1
+        assert cache.stats()["errors"] == 0
+
+class FakePubSub:
+    def __init__(self, messages: asyncio.Queue):
+        self.messages = messages
+        self.channels = set()
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    async def unsubscribe(self, *channels):
+        self.channels.difference_update(channels)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=None):
+        return await self.messages.get()
+
+    async def aclose(self):
+        self.closed = True
+
+
+class TestTaskEvents:
+    async def test_mutations_publish_events(self, session: AsyncSession, test_user: User, redis_store: dict):
+        task = await TaskService.create_task(TaskCreate(title="Task", description="Description"), test_user, session)
+        version = task.version
+        await TaskService.patch_task(task.id, TaskUpdate(completed=True), test_user, session)
+        await TaskService.delete_task(task.id, test_user, session)
+
+        events = [json.loads(message) for message in redis_store[f"tasks:events:{test_user.id}"]]
+        assert [(e["changed"], e["deleted"]) for e in events] == [([task.id], []), ([task.id], []), ([], [task.id])]
+        assert [e["version"] for e in events] == [version, version + 1, version + 2]
+
+    async def test_hub_routes_events_to_subscribers(self, monkeypatch):
+        messages = asyncio.Queue()
+        monkeypatch.setattr("src.tasks.events.create_pubsub", lambda: FakePubSub(messages))
+        hub = PubSubHub("tasks:events:", queue_size=2, connect=lambda: FakePubSub(messages))
+        user_id, other_id = str(uuid4()), str(uuid4())
+
+        async with hub.subscribe(user_id) as first, hub.subscribe(user_id) as second, hub.subscribe(other_id) as other:
+            assert hub.stats()["keys"] == 2 and hub.stats()["listeners"] == 3
+
+            await messages.put({"channel": f"tasks:events:{user_id}", "data": "event"})
+            assert await asyncio.wait_for(first.get(), 1) == "event"
+            assert await asyncio.wait_for(second.get(), 1) == "event"
+            assert other.empty()
+
+            # A slow client keeps only the newest events
+            for i in range(3):
+                hub._dispatch(f"tasks:events:{other_id}", str(i))
+            assert [other.get_nowait(), other.get_nowait()] == ["1", "2"]
+            assert hub.stats()["dropped"] == 1
+
+        assert hub.stats()["listeners"] == 0
+        await hub.close()
+
+    async def test_hub_subscribes_per_channel(self):
+        pubsub = FakePubSub(asyncio.Queue())
+        hub = PubSubHub("tasks:events:", queue_size=2, connect=lambda: pubsub)
+        user_id, other_id = str(uuid4()), str(uuid4())
+
+        async with hub.subscribe(user_id):
+            # The listener connects with the keys known at that point
+            await asyncio.sleep(0)
+            assert pubsub.channels == {f"tasks:events:{user_id}"}
+
+            async with hub.subscribe(user_id), hub.subscribe(other_id):
+                assert pubsub.channels == {f"tasks:events:{user_id}", f"tasks:events:{other_id}"}
+
+            # Only the last listener of a key unsubscribes from its channel
+            assert pubsub.channels == {f"tasks:events:{user_id}"}
+
+        # With nobody left the listener stops and closes its connection
+        await asyncio.sleep(0)
+        assert pubsub.closed
+        assert hub._listener is None
+
+        # and the next subscriber starts a new one
+        async with hub.subscribe(other_id):
+            await asyncio.sleep(0)
+            assert hub._listener is not None and not hub._listener.done()
+        await hub.close()
+
+    async def test_sse_stream(self):
+        hub = PubSubHub("tasks:events:", queue_size=10, connect=lambda: FakePubSub(asyncio.Queue()))
+        user_id = uuid4()
+
+        stream = sse_stream(hub, user_id, keepalive=0.01)
+        assert await anext(stream) == ": keepalive\n\n"
+
+        hub._dispatch(f"tasks:events:{user_id}", '{"version":1}')
+        assert await anext(stream) == 'data: {"version":1}\n\n'
+
+        await stream.aclose()
+        assert hub.stats()["listeners"] == 0
+        await hub.close()
+
+
+@pytest.fixture(name="job_results")
+def job_results_fixture(monkeypatch):
+    results = {}
+
+    async def fake_mget_results(keys):
+        return [results.get(key) for key in keys]
+
+    monkeypatch.setattr("src.tasks.job_status.mget_results", fake_mget_results)
+    return results
+
+
+@pytest.fixture(name="job_status_hub")
+async def job_status_hub_fixture(monkeypatch):
+    hub = PubSubHub("celery-task-meta-", queue_size=10, connect=lambda: FakePubSub(asyncio.Queue()))
+    monkeypatch.setattr("src.tasks.job_status.job_status_hub", hub)
+    yield hub
+    await hub.close()
+
+
+def encode_job_meta(task_id, state, result=None):
+    return celery_app.backend.encode({"status": state, "result": result, "task_id": task_id})
+
+
+class TestJobStatus:
+    async def test_get_job_statuses(self, job_results: dict):
+        job_results[b"celery-task-meta-done"] = encode_job_meta("done", "SUCCESS", {"task_id": 1})
+        job_results[b"celery-task-meta-running"] = encode_job_meta("running", "PROGRESS", {"step": "creating"})
+
+        statuses = await get_job_statuses(["done", "running", "unknown"])
+
+        assert [(s["status"], s["result"]) for s in statuses] == [
+            ("SUCCESS", {"task_id": 1}), ("PROGRESS", None), ("PENDING", None)
+        ]
+        assert statuses[1]["info"] == {"step": "creating"}
+
+    async def test_stream_job_statuses(self, job_results: dict, job_status_hub: PubSubHub):
+        job_results[b"celery-task-meta-job"] = encode_job_meta("job", "STARTED")
+        stream = stream_job_statuses(["job"], refresh_interval=10)
+
+        first = await anext(stream)
+        assert first.startswith("event: status") and '"STARTED"' in first
+
+        job_status_hub._dispatch("celery-task-meta-job", encode_job_meta("job", "PROGRESS", {"step": 1}))
+        assert '"PROGRESS"' in await anext(stream)
+
+        job_status_hub._dispatch("celery-task-meta-job", encode_job_meta("job", "SUCCESS", 42))
+        assert '"SUCCESS"' in await anext(stream)
+        assert await anext(stream) == "event: done\ndata: {}\n\n"
+        assert job_status_hub.stats()["listeners"] == 0
+
+
+def add_users(engine, count, disabled=()):
+    with Session(engine) as db:
+        users = [
+            User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="hashed", disabled=i in disabled)
+            for i in range(count)
+        ]
+        db.add_all(users)
+        db.commit()
+        return sorted(str(user.id) for user in users)
+
+
+class TestRandomTaskSeeding:
+    def test_user_id_ranges(self, sync_engine):
+        ids = add_users(sync_engine, 5)
+
+        with Session(sync_engine) as db:
+            assert user_id_ranges(db, 2) == [(None, ids[1]), (ids[1], ids[3]), (ids[3], None)]
+
+    def test_seed_chunk(self, sync_engine, monkeypatch):
+        add_users(sync_engine, 4, disabled={0})
+        bumped, published = [], []
+        monkeypatch.setattr("src.tasks.tasks.task_list_cache", SimpleNamespace(bump_many_sync=lambda users: bumped.extend(users)))
+        monkeypatch.setattr("src.tasks.tasks.publish_task_events_sync", lambda events: published.extend(events))
+
+        with Session(sync_engine) as db:
+            active = sorted(str(user.id) for user in db.exec(select(User).where(User.disabled == False)).all())
+
+        result = seed_random_tasks_chunk(None, active[1])
+
+        assert result == {"users": 2, "created": 2}
+        with Session(sync_engine) as db:
+            tasks = db.exec(select(Task)).all()
+        assert sorted(str(task.user_id) for task in tasks) == active[:2]
+        assert all(task.version == 1 and task.title.startswith("[AUTO]") for task in tasks)
+        assert len(bumped) == 2 and len(published) == 2
+
+    def test_periodic_task_dispatches_chord(self, sync_engine, monkeypatch):
+        add_users(sync_engine, 3)
+        dispatched = {}
+
+        def fake_chord(header, body):
+            dispatched["header"] = list(header.tasks)
+            dispatched["body"] = body
+            return SimpleNamespace(apply_async=lambda: SimpleNamespace(id="chord-1"))
+
+        monkeypatch.setattr("src.tasks.tasks.chord", fake_chord)
+        monkeypatch.setattr(settings, "seed_chunk_size", 2)
+
+        result = periodic_add_random_task()
+
+        assert result["chunks"] == 2 and result["chord_id"] == "chord-1"
+        assert [sig.task for sig in dispatched["header"]] == ["src.tasks.tasks.seed_random_tasks_chunk"] * 2
+        assert dispatched["body"].task == "src.tasks.tasks.summarize_random_task_seeding"
+
+    def test_summarize(self):
+        summary = summarize_random_task_seeding([{"users": 2, "created": 2}, {"users": 1, "created": 1}], "start")
+        assert (summary["chunks"], summary["users"], summary["created"]) == (2, 3, 3)
+
+
+class FakeReminderRedis:
+    def __init__(self):
+        self.sets = {}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def __enter__(self):
+        self.results = []
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def sadd(self, key, member):
+        members = self.sets.setdefault(key, set())
+        self.results.append(int(member not in members))
+        members.add(member)
+
+    def srem(self, key, member):
+        self.sets.get(key, set()).discard(member)
+        self.results.append(1)
+
+    def expire(self, key, seconds):
+        self.results.append(True)
+
+    def execute(self):
+        return self.results
+
+
+class FakeBatcher:
+    def __init__(self, full=()):
+        self.full = set(full)
+        self.sent = []
+
+    def enqueue_many(self, notifications):
+        notifications = list(notifications)
+        self.sent.extend(item for item in notifications if item[0] not in self.full)
+        return [recipient for recipient, _ in notifications if recipient in self.full]
+
+
+class TestDeadlineReminders:
+    @pytest.fixture(name="due_tasks")
+    def due_tasks_fixture(self, sync_engine):
+        now = utcnow()
+        with Session(sync_engine) as db:
+            users = [
+                User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="hashed", disabled=i == 2)
+                for i in range(3)
+            ]
+            db.add_all(users)
+            db.flush()
+            db.add_all([
+                Task(title="soon", description="d", user_id=users[0].id, deadline=now + timedelta(minutes=10)),
+                Task(title="sooner", description="d", user_id=users[0].id, deadline=now + timedelta(minutes=5)),
+                Task(title="later", description="d", user_id=users[1].id, deadline=now + timedelta(minutes=30)),
+                Task(title="done", description="d", user_id=users[1].id, deadline=now + timedelta(minutes=5), completed=True),
+                Task(title="next week", description="d", user_id=users[1].id, deadline=now + timedelta(days=7)),
+                Task(title="overdue", description="d", user_id=users[1].id, deadline=now - timedelta(minutes=5)),
+                Task(title="disabled", description="d", user_id=users[2].id, deadline=now + timedelta(minutes=5)),
+            ])
+            db.commit()
+        return now
+
+    def run(self, monkeypatch, redis, batcher):
+        monkeypatch.setattr("src.tasks.tasks.redis_client", redis)
+        monkeypatch.setattr("src.tasks.tasks.notification_batcher", batcher)
+        return send_deadline_reminders()
+
+    def test_due_task_batches(self, sync_engine, due_tasks):
+        with Session(sync_engine) as db:
+            batches = list(due_task_batches(db, due_tasks, due_tasks + timedelta(hours=1), 2))
+
+        assert [[row.title for row in batch] for batch in batches] == [["sooner", "soon"], ["later"]]
+
+    def test_sends_one_reminder_per_user(self, sync_engine, due_tasks, monkeypatch):
+        batcher = FakeBatcher()
+
+        totals = self.run(monkeypatch, FakeReminderRedis(), batcher)
+
+        assert totals == {"due": 3, "sent": 3, "users": 2, "deferred": 0}
+        messages = dict(batcher.sent)
+        assert sorted(messages) == ["user0@example.com", "user1@example.com"]
+        assert messages["user0@example.com"].startswith("2 task(s) due soon:")
+        assert messages["user0@example.com"].index("sooner") < messages["user0@example.com"].index("soon (")
+
+    def test_reminders_are_sent_once(self, sync_engine, due_tasks, monkeypatch):
+        redis, batcher = FakeReminderRedis(), FakeBatcher()
+
+        self.run(monkeypatch, redis, batcher)
+        totals = self.run(monkeypatch, redis, batcher)
+
+        assert totals["due"] == 3 and totals["sent"] == 0
+        assert len(batcher.sent) == 2
+
+    def test_full_buffer_defers_reminders(self, sync_engine, due_tasks, monkeypatch):
+        redis = FakeReminderRedis()
+
+        totals = self.run(monkeypatch, redis, FakeBatcher(full={"user1@example.com"}))
+        assert totals == {"due": 3, "sent": 2, "users": 1, "deferred": 1}
+
+        batcher = FakeBatcher()
+        totals = self.run(monkeypatch, redis, batcher)
+        assert totals["sent"] == 1
+        assert [recipient for recipient, _ in batcher.sent] == ["user1@example.com"]
+
 
 class TestTaskController:
-    def test_create_task_endpoint(self, client: TestClient):
+    async def test_create_task_endpoint(self, client: AsyncClient):
         task_data = {
             "title": "Test Task",
             "description": "Test Description"
         }
-        response = client.post("/tasks/create", json=task_data)
+        response = await client.post("/tasks/create", json=task_data)
         assert response.status_code == 201
         data = response.json()
         assert data["title"] == "Test Task"
         assert data["description"] == "Test Description"
         assert data["completed"] is False
 
-    def test_get_all_tasks_endpoint(self, client: TestClient):
+    async def test_get_all_tasks_endpoint(self, client: AsyncClient):
         # Create a task first
         task_data = {
             "title": "Test Task",
             "description": "Test Description"
         }
-        client.post("/tasks/create", json=task_data)
+        await client.post("/tasks/create", json=task_data)
 
-        response = client.get("/tasks/get_all")
+        response = await client.get("/tasks/get_all")
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 1
         assert data[0]["title"] == "Test Task"
 
-    def test_update_task_endpoint(self, client: TestClient):
+        await client.post("/tasks/create", json={"title": "Second Task", "description": "Test Description"})
+        response = await client.get("/tasks/get_all")
+        assert [t["title"] for t in response.json()] == ["Test Task", "Second Task"]
+
+    async def test_list_tasks_endpoint(self, client: AsyncClient):
+        for i in range(3):
+            await client.post("/tasks/create", json={"title": f"Task {i}", "description": "Description"})
+
+        response = await client.get("/tasks/list", params={"limit": 2})
+        assert response.status_code == 200
+        data = response.json()
+        assert [t["title"] for t in data["items"]] == ["Task 0", "Task 1"]
+        assert data["next_cursor"] is not None
+
+        response = await client.get("/tasks/list", params={"limit": 2, "after": data["next_cursor"]})
+        data = response.json()
+        assert [t["title"] for t in data["items"]] == ["Task 2"]
+        assert data["next_cursor"] is None
+
+    async def test_aware_deadlines_are_stored_as_naive_utc(self, client: AsyncClient):
+        response = await client.post(
+            "/tasks/create", json={"title": "Zulu", "description": "d", "deadline": "2025-08-01T12:00:00Z"}
+        )
+        assert response.status_code == 201
+        assert response.json()["deadline"] == "2025-08-01T12:00:00"
+        task_id = response.json()["id"]
+
+        response = await client.patch(f"/tasks/{task_id}", json={"deadline": "2025-08-01T12:00:00+05:00"})
+        assert response.status_code == 200
+        assert response.json()["deadline"] == "2025-08-01T07:00:00"
+
+        response = await client.get(
+            "/tasks/list",
+            params={"deadline_from": "2025-08-01T11:30:00+05:00", "deadline_to": "2025-08-01T07:30:00Z"},
+        )
+        assert response.status_code == 200
+        assert [t["id"] for t in response.json()["items"]] == [task_id]
+
+    async def test_list_tasks_invalid_cursor_endpoint(self, client: AsyncClient):
+        response = await client.get("/tasks/list", params={"after": "not-a-cursor"})
+        assert response.status_code == 400
+
+    async def test_bulk_endpoint(self, client: AsyncClient):
+        response = await client.post("/tasks/bulk", json={
+            "create": [{"title": "Task 1", "description": "Description"}, {"title": "Task 2"}],
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert [t["title"] for t in data["created"]] == ["Task 1"]
+        assert data["errors"][0]["index"] == 1
+
+        response = await client.post("/tasks/bulk", json={"delete": [data["created"][0]["id"]]})
+        assert response.json()["deleted"] == [data["created"][0]["id"]]
+
+    async def test_changes_endpoint(self, client: AsyncClient):
+        created = (await client.post("/tasks/create", json={"title": "Task", "description": "Description"})).json()
+
+        response = await client.get("/tasks/changes")
+        assert response.status_code == 200
+        data = response.json()
+        assert [t["id"] for t in data["changed"]] == [created["id"]]
+
+        await client.delete(f"/tasks/delete/{created['id']}")
+        response = await client.get("/tasks/changes", params={"since": data["version"]})
+        assert response.json()["changed"] == []
+        assert response.json()["deleted"] == [created["id"]]
+
+        response = await client.get("/tasks/changes", params={"since": -1})
+        assert response.status_code == 422
+
+    async def test_due_and_overdue_endpoints(self, client: AsyncClient):
+        now = utcnow()
+        for title, offset in (("Overdue", -1), ("Soon", 1)):
+            await client.post("/tasks/create", json={
+                "title": title, "description": "Description", "deadline": (now + timedelta(hours=offset)).isoformat()
+            })
+
+        response = await client.get("/tasks/due", params={"hours": 12})
+        assert [t["title"] for t in response.json()["items"]] == ["Soon"]
+
+        response = await client.get("/tasks/overdue")
+        assert [t["title"] for t in response.json()["items"]] == ["Overdue"]
+
+        response = await client.get("/tasks/due/summary")
+        assert response.json() == {"overdue": 1, "due_soon": 1, "window_hours": 24}
+
+    async def test_search_endpoint(self, client: AsyncClient):
+        await client.post("/tasks/create", json={"title": "Deploy release", "description": "Description"})
+        await client.post("/tasks/create", json={"title": "Other", "description": "Description"})
+
+        response = await client.get("/tasks/search", params={"q": "deploy"})
+        assert response.status_code == 200
+        assert [t["title"] for t in response.json()["items"]] == ["Deploy release"]
+
+        response = await client.get("/tasks/search", params={"q": ""})
+        assert response.status_code == 422
+
+    async def test_export_ndjson_endpoint(self, client: AsyncClient):
+        for i in range(3):
+            await client.post("/tasks/create", json={"title": f"Task {i}", "description": "Description"})
+
+        response = await client.get("/tasks/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["title"] for row in rows] == ["Task 0", "Task 1", "Task 2"]
+
+    async def test_export_csv_gzip_endpoint(self, client: AsyncClient):
+        await client.post("/tasks/create", json={"title": "Task, with comma", "description": "Description"})
+
+        response = await client.get("/tasks/export", params={"format": "csv", "gzip": True})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert rows[0] == ["id", "title", "description", "deadline", "completed"]
+        assert rows[1][1] == "Task, with comma"
+
+    async def test_import_endpoint(self, client: AsyncClient, monkeypatch, tmp_path):
+        calls = []
+        monkeypatch.setattr(settings, "import_dir", str(tmp_path))
+        monkeypatch.setattr(
+            "src.tasks.controller.import_tasks_job",
+            SimpleNamespace(apply_async=lambda args, expires: calls.append(args) or SimpleNamespace(id="job-1")),
+        )
+
+        response = await client.post(
+            "/tasks/import",
+            files={"file": ("tasks.csv", b"title,description\nTask 1,Description\n", "text/csv")},
+        )
+        assert response.status_code == 202
+        assert response.json()["celery_task_id"] == "job-1"
+
+        path, file_format, _ = calls[0]
+        assert file_format == "csv"
+        with open(path, encoding="utf-8") as uploaded:
+            assert uploaded.read().startswith("title,description")
+
+    async def test_import_endpoint_requires_import_dir(self, client: AsyncClient, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "import_dir", str(tmp_path / "missing"))
+
+        response = await client.post("/tasks/import", files={"file": ("tasks.csv", b"title,description\n", "text/csv")})
+        assert response.status_code == 503
+
+    async def test_import_endpoint_removes_upload_when_enqueue_fails(self, client: AsyncClient, monkeypatch, tmp_path):
+        def fail(*args, **kwargs):
+            raise ConnectionError("broker down")
+
+        monkeypatch.setattr(settings, "import_dir", str(tmp_path))
+        monkeypatch.setattr("src.tasks.controller.import_tasks_job", SimpleNamespace(apply_async=fail))
+
+        response = await client.post("/tasks/import", files={"file": ("tasks.csv", b"title,description\n", "text/csv")})
+        assert response.status_code == 500
+        assert list(tmp_path.iterdir()) == []
+
+    async def test_task_status_batch_endpoint(self, client: AsyncClient, job_results: dict):
+        job_results[b"celery-task-meta-done"] = encode_job_meta("done", "SUCCESS", {"task_id": 1})
+
+        response = await client.post("/tasks/task-status/batch", json={"ids": ["done", "unknown", "done"]})
+        assert response.status_code == 200
+        assert response.json()["statuses"] == [
+            {"task_id": "done", "status": "SUCCESS", "result": {"task_id": 1}, "info": {"task_id": 1}},
+            {"task_id": "unknown", "status": "PENDING"},
+        ]
+
+        response = await client.post("/tasks/task-status/batch", json={"ids": []})
+        assert response.status_code == 422
+
+    async def test_update_task_endpoint(self, client: AsyncClient):
         # Create a task first
         task_data = {
             "title": "Original Title",
             "description": "Original Description"
         }
-        create_response = client.post("/tasks/create", json=task_data)
+        create_response = await client.post("/tasks/create", json=task_data)
         task_id = create_response.json()["id"]
 
         # Update the task
@@ -223,37 +1198,50 @@ class TestTaskController:
             "title": "Updated Title",
             "description": "Updated Description"
         }
-        response = client.put(f"/tasks/update/{task_id}", json=update_data)
+        response = await client.put(f"/tasks/update/{task_id}", json=update_data)
         assert response.status_code == 200
         data = response.json()
         assert data["title"] == "Updated Title"
         assert data["description"] == "Updated Description"
 
-    def test_update_nonexistent_task_endpoint(self, client: TestClient):
+    async def test_update_nonexistent_task_endpoint(self, client: AsyncClient):
         update_data = {
             "title": "Updated Title",
             "description": "Updated Description"
         }
-        response = client.put("/tasks/update/999", json=update_data)
+        response = await client.put("/tasks/update/999", json=update_data)
+        assert response.status_code == 404
+
+    async def test_patch_task_endpoint(self, client: AsyncClient):
+        create_response = await client.post("/tasks/create", json={"title": "Title", "description": "Description"})
+        task_id = create_response.json()["id"]
+
+        response = await client.patch(f"/tasks/{task_id}", json={"completed": True})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["completed"] is True
+        assert data["title"] == "Title"
+
+        response = await client.patch("/tasks/999", json={"completed": True})
         assert response.status_code == 404
 
-    def test_delete_task_endpoint(self, client: TestClient):
+    async def test_delete_task_endpoint(self, client: AsyncClient):
         # Create a task first
         task_data = {
             "title": "To Delete",
             "description": "Description"
         }
-        create_response = client.post("/tasks/create", json=task_data)
+        create_response = await client.post("/tasks/create", json=task_data)
         task_id = create_response.json()["id"]
 
         # Delete the task
-        response = client.delete(f"/tasks/delete/{task_id}")
+        response = await client.delete(f"/tasks/delete/{task_id}")
         assert response.status_code == 200
 
         # Verify task is deleted
-        get_response = client.get("/tasks/get_all")
+        get_response = await client.get("/tasks/get_all")
         assert len(get_response.json()) == 0
 
-    def test_delete_nonexistent_task_endpoint(self, client: TestClient):
-        response = client.delete("/tasks/delete/999")
+    async def test_delete_nonexistent_task_endpoint(self, client: AsyncClient):
+        response = await client.delete("/tasks/delete/999")
         assert response.status_code == 404
@@ -0,0 +1,57 @@
+"""
+Starts a Celery worker for one queue profile:
+
+    python -m src.worker realtime
+    python -m src.worker bulk --loglevel DEBUG
+    python -m src.worker default --print    # show the command instead of running it
+"""
+import argparse
+import shlex
+from dataclasses import dataclass
+from typing import Dict, List
+
+from src.celery import BULK_QUEUE, DEFAULT_QUEUE, REALTIME_QUEUE, celery_app
+from src.config import settings
+
+@dataclass
+class WorkerProfile:
+    queues: List[str]
+    concurrency: int
+    prefetch_multiplier: int
+
+# Realtime workers keep no backlog of their own, so one long task can't delay
+# messages already reserved behind it; default jobs are short and can prefetch
+WORKER_PROFILES: Dict[str, WorkerProfile] = {
+    REALTIME_QUEUE: WorkerProfile([REALTIME_QUEUE], settings.celery_realtime_concurrency, settings.celery_realtime_prefetch),
+    DEFAULT_QUEUE: WorkerProfile([DEFAULT_QUEUE], settings.celery_default_concurrency, settings.celery_default_prefetch),
+    BULK_QUEUE: WorkerProfile([BULK_QUEUE], settings.celery_bulk_concurrency, settings.celery_bulk_prefetch),
+}
+
+def worker_argv(profile_name: str, loglevel: str = "INFO", extra: List[str] = ()) -> List[str]:
+    profile = WORKER_PROFILES[profile_name]
+    return [
+        "worker",
+        "--queues", ",".join(profile.queues),
+        "--concurrency", str(profile.concurrency),
+        "--prefetch-multiplier", str(profile.prefetch_multiplier),
+        "--hostname", f"{profile_name}@%h",
+        "--loglevel", loglevel,
+        *extra,
+    ]
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(description="Start a Celery worker for one queue profile.")
+    parser.add_argument("profile", choices=sorted(WORKER_PROFILES))
+    parser.add_argument("--loglevel", default="INFO")
+    parser.add_argument("--print", action="store_true", help="print the celery command instead of running it")
+    options, extra = parser.parse_known_args(args)
+
+    argv = worker_argv(options.profile, options.loglevel, extra)
+    if options.print:
+        print(shlex.join(["celery", "-A", "src.celery:celery_app", *argv]))
+        return
+
+    celery_app.worker_main(argv)
+
+if __name__ == "__main__":
+    main()